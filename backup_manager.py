@@ -14,7 +14,10 @@ def create_backup(args):
         db_path=args.db_path,
         backup_dir=args.backup_dir,
         max_age_days=args.max_age_days,
-        compress=args.compress
+        compress=args.compress,
+        codec=args.codec,
+        step_pages=args.pages,
+        step_sleep_ms=args.sleep_ms
     )
     
     print("Creating manual backup...")
@@ -28,6 +31,45 @@ def create_backup(args):
         return 1
 
 
+def create_incremental(args):
+    """Create an incremental (changed pages only) backup."""
+    backup_service = BackupService(
+        db_path=args.db_path,
+        backup_dir=args.backup_dir,
+        max_age_days=args.max_age_days,
+        compress=args.compress,
+        codec=args.codec,
+        step_pages=args.pages,
+        step_sleep_ms=args.sleep_ms
+    )
+    
+    print("Creating incremental backup...")
+    delta_path = backup_service.create_incremental_backup()
+    print(f"Incremental backup created: {delta_path}")
+    return 0
+
+
+def restore_incremental(args):
+    """Restore database from incremental backups."""
+    backup_service = BackupService(
+        db_path=args.db_path,
+        backup_dir=args.backup_dir,
+        max_age_days=args.max_age_days,
+        compress=args.compress
+    )
+    
+    target = backup_service.restore_incremental_backup(args.output)
+    print(f"Database restored to {target}")
+    return 0
+
+
+def _fmt_size(size: int) -> str:
+    """Format a file size in MB or KB."""
+    if size > 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
 def list_backups(args):
     """List existing backups."""
     backup_service = BackupService(
@@ -53,10 +95,13 @@ def list_backups(args):
     
     if info['backup_files']:
         print(f"\nBackup Files:")
-        for backup in info['backup_files']:
-            size_str = f"{backup['size'] / (1024*1024):.1f} MB" if backup['size'] > 1024*1024 else f"{backup['size'] / 1024:.1f} KB"
-            expires_indicator = " (expires soon)" if backup.get('expires_soon') else ""
-            print(f"   {backup['name']} - {size_str} - {backup['age_days']} days old{expires_indicator}")
+        # Build the whole table first and write it with a single call
+        lines = [
+            f"   {backup['name']} - {_fmt_size(backup['size'])} - {backup['age_days']} days old"
+            f"{' (expires soon)' if backup.get('expires_soon') else ''}"
+            for backup in info['backup_files']
+        ]
+        sys.stdout.write("\n".join(lines) + "\n")
     
     return 0
 
@@ -83,7 +128,10 @@ async def test_service(args):
         backup_dir=args.backup_dir,
         max_age_days=1,  # 1 day for testing
         backup_interval_hours=0.001,  # Very short interval for testing
-        compress=args.compress
+        compress=args.compress,
+        codec=args.codec,
+        step_pages=args.pages,
+        step_sleep_ms=args.sleep_ms
     )
     
     print("Testing backup service...")
@@ -113,6 +161,9 @@ def main():
     parser.add_argument("--max-age-days", type=int, default=2, help="Maximum age of backups in days")
     parser.add_argument("--compress", action="store_true", default=True, help="Compress backups")
     parser.add_argument("--no-compress", action="store_false", dest="compress", help="Don't compress backups")
+    parser.add_argument("--codec", choices=["gzip", "zstd"], default="zstd", help="Compression codec (zstd falls back to gzip if not installed)")
+    parser.add_argument("--pages", type=int, default=1000, help="SQLite pages copied per backup step (-1 = all at once)")
+    parser.add_argument("--sleep-ms", type=float, default=5, help="Pause between backup steps in milliseconds")
     
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
@@ -120,6 +171,14 @@ def main():
     create_parser = subparsers.add_parser("create", help="Create a manual backup")
     create_parser.set_defaults(func=create_backup)
     
+    # Incremental backup commands
+    incremental_parser = subparsers.add_parser("incremental", help="Create an incremental backup (changed pages only)")
+    incremental_parser.set_defaults(func=create_incremental)
+    
+    restore_parser = subparsers.add_parser("restore-incremental", help="Restore database from incremental backups")
+    restore_parser.add_argument("--output", required=True, help="Path of the restored database file")
+    restore_parser.set_defaults(func=restore_incremental)
+    
     # List backups command
     list_parser = subparsers.add_parser("list", help="List existing backups")
     list_parser.set_defaults(func=list_backups)
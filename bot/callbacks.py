@@ -0,0 +1,34 @@
+"""Typed callback data for inline keyboards."""
+
+from enum import IntEnum
+
+from aiogram.filters.callback_data import CallbackData
+
+
+class InfoSection(IntEnum):
+    """Разделы меню "О розыгрыше" (короткие числовые коды в callback_data)."""
+    BACK = 0
+    RULES = 1
+    STICKERS = 2
+    PARTICIPATE = 3
+    PRIZES = 4
+    SCHEDULE = 5
+    SBERPAY_ID = 6
+    SBERPAY_APP = 7
+
+
+class InfoCallback(CallbackData, prefix="info"):
+    section: InfoSection
+
+
+# Старые строковые callback_data из уже отправленных клавиатур
+LEGACY_INFO_SECTIONS = {
+    "info_back": InfoSection.BACK,
+    "info_rules": InfoSection.RULES,
+    "info_stickers": InfoSection.STICKERS,
+    "info_participate": InfoSection.PARTICIPATE,
+    "info_prizes": InfoSection.PRIZES,
+    "info_schedule": InfoSection.SCHEDULE,
+    "info_sberpay_id": InfoSection.SBERPAY_ID,
+    "info_sberpay_app": InfoSection.SBERPAY_APP,
+}
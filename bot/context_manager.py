@@ -3,16 +3,93 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional, List
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from types import MappingProxyType
+from typing import Any, Callable, Deque, Dict, Optional, List, Mapping, Set, Tuple
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from aiogram import types
 from aiogram.fsm.context import FSMContext
 
-from database.repositories import get_participant_status
-from services.cache import get_cache
+from database.repositories import get_participant_statuses
+
+
+logger = logging.getLogger(__name__)
+
+
+# Остроумные ответы для разных ситуаций (только для чтения)
+_WITTY_RESPONSES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "sticker_in_registration": (
+        "😄 Отличный стикер! Но сейчас мне нужно ваше имя текстом - стикеры я пока не умею читать 🤖",
+        "🎨 Красиво! А теперь давайте познакомимся через имя в текстовом формате",
+        "😊 Стикер принят с благодарностью! Но для регистрации нужно старомодное текстовое имя"
+    ),
+    "voice_unexpected": (
+        "🎙️ Голос отличный! Но я лучше читаю, чем слушаю - напишите, пожалуйста, текстом",
+        "🔊 Интересно звучит! К сожалению, мои уши пока в разработке - текст предпочтительнее",
+        "🎵 Музыка для моих схем! Но давайте переключимся на письменное общение"
+    ),
+    "confusion_general": (
+        "🤔 Кажется, мы немного запутались! Ничего страшного - такое бывает с каждым",
+        "🧭 Похоже, мы свернули не туда. Давайте я покажу правильную дорогу!",
+        "🔄 Небольшая навигационная заминка? Это нормально! Сейчас все исправим"
+    ),
+    "wrong_content_type": (
+        "📎 Вижу, что вы отправили {content_type}! Но сейчас лучше подойдет {expected_type}",
+        "🎯 {content_type} получен, но для этого шага нужен {expected_type}. Попробуем еще раз?",
+        "🔄 {content_type} - хорошая попытка! Но давайте попробуем {expected_type}"
+    ),
+})
+
+# Общие фразы, по которым видно, что пользователь растерян
+_GENERIC_PHRASES_RE = re.compile(
+    "|".join(re.escape(phrase) for phrase in (
+        "что", "как", "помоги", "не понимаю", "не работает", "???", "хелп", "help"
+    )),
+    re.IGNORECASE,
+)
+# Слова, которыми пользователь описывает загрузку фото
+_PHOTO_HINT_RE = re.compile(r"фото|галер|камер", re.IGNORECASE)
+
+# Подсказки для конкретных FSM состояний (ключ - имя состояния без группы)
+_SUGGESTION_BY_STATE_KEY: Dict[str, Dict[str, Any]] = {
+    "enter_name": {
+        "context": "registration_name",
+        "message": "🤔 Кажется, вы застряли на вводе имени!\n\n✨ Подсказка: введите ваше полное имя как в паспорте, например: **Иванов Иван Иванович**",
+        "quick_actions": ["⬅️ Вернуться в меню", "❓ Что такое полное имя?"],
+        "next_step_hint": "После имени мы попросим ваш номер телефона 📱"
+    },
+    "enter_phone": {
+        "context": "registration_phone",
+        "message": "📱 Давайте разберемся с номером телефона!\n\n🎯 Два простых способа:\n• Нажать **📞 Отправить мой номер**\n• Или написать в формате **+79001234567**",
+        "quick_actions": ["📞 Отправить контакт", "⬅️ К имени", "🏠 В меню"],
+        "next_step_hint": "Далее понадобится номер карты лояльности 💳"
+    },
+    "upload_photo": {
+        "context": "registration_photo",
+        "message": "📸 Последний шаг - фото лифлета!\n\n🎨 **Лифлет** - это рекламная листовка или баннер мероприятия\n\n✅ Попробуйте:\n• **📷 Сделать фото** прямо сейчас\n• **🖼️ Выбрать из галереи**",
+        "quick_actions": ["📷 Камера", "🖼️ Галерея", "❓ Что такое лифлет?"],
+        "next_step_hint": "После фото заявка отправится на модерацию! 🎉"
+    },
+    "entering_message": {
+        "context": "support_message",
+        "message": "💬 Создаем обращение в поддержку!\n\n📝 **Опишите проблему** - чем подробнее, тем быстрее поможем\n\n📎 Можете приложить фото или документ для наглядности",
+        "quick_actions": ["📷 Добавить фото", "📄 Добавить файл", "✅ Отправить"],
+        "next_step_hint": "Наша команда ответит в течение 24 часов ⏰"
+    },
+}
+
+_NEW_USER_SUGGESTION: Dict[str, Any] = {
+    "context": "new_user",
+    "message": "👋 Добро пожаловать!\n\n🎯 Начните с **🚀 Начать регистрацию** для участия в розыгрыше\n\n🔍 Или изучите **📊 О розыгрыше** чтобы узнать больше",
+    "quick_actions": ["🚀 Регистрация", "📊 О розыгрыше", "💬 Поддержка"],
+    "next_step_hint": "Регистрация займет всего 2-3 минуты! ⚡"
+}
 
 
 class UserContext(Enum):
@@ -38,74 +115,200 @@ class UserAction(Enum):
     UNEXPECTED = "unexpected"
 
 
-@dataclass
+@dataclass(slots=True)
 class UserSession:
     """Информация о сессии пользователя"""
     telegram_id: int
     current_context: UserContext
     last_action: Optional[UserAction]
-    last_message_time: datetime
+    last_message_time: float  # time.monotonic() последнего сообщения
     consecutive_errors: int
     registration_status: Optional[str]
-    breadcrumbs: List[str]  # История навигации
-    hints_shown: List[str]  # Показанные подсказки
+    breadcrumbs: Deque[str] = field(default_factory=lambda: deque(maxlen=10))  # История навигации
+    hints_shown: Set[str] = field(default_factory=set)  # Показанные подсказки
     preferred_style: str = "friendly"  # friendly, professional, witty
 
 
 class ContextManager:
     """Центральный менеджер контекста пользователей"""
     
+    # Ограничения на хранилище сессий (LRU + TTL)
+    MAX_SESSIONS = 10000
+    SESSION_TTL_SECONDS = 2 * 3600
+    SWEEP_EVERY = 256  # Ленивая очистка устаревших сессий раз в N вставок
+    STATUS_BATCH_DELAY = 0.005  # Окно объединения запросов статуса, сек
+    
     def __init__(self):
-        self.sessions: Dict[int, UserSession] = {}
-        self.cache = get_cache()
+        self.sessions: "OrderedDict[int, UserSession]" = OrderedDict()
+        self._inserts_since_sweep = 0
+        self._pending_status: Dict[int, asyncio.Future] = {}
+        self._status_flush_handle: Optional[asyncio.TimerHandle] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        # Изменения для пользователей, чья сессия еще создается (в порядке поступления)
+        self._deferred: Dict[int, List[Tuple[Callable[..., None], Tuple[Any, ...]]]] = {}
         
     async def get_or_create_session(self, telegram_id: int) -> UserSession:
         """Получить или создать сессию пользователя"""
-        if telegram_id not in self.sessions:
-            # Создаем новую сессию
-            registration_status = await get_participant_status(telegram_id)
-            
-            self.sessions[telegram_id] = UserSession(
-                telegram_id=telegram_id,
-                current_context=UserContext.IDLE,
-                last_action=None,
-                last_message_time=datetime.now(),
-                consecutive_errors=0,
-                registration_status=registration_status,
-                breadcrumbs=[],
-                hints_shown=[]
-            )
-        
-        return self.sessions[telegram_id]
-    
-    async def update_context(self, telegram_id: int, context: UserContext, action: UserAction = None):
-        """Обновить контекст пользователя"""
-        session = await self.get_or_create_session(telegram_id)
+        session = self._touch_session(telegram_id)
+        if session is not None:
+            return session
+        
+        # Создаем новую сессию; статус запрашивается пачкой вместе с соседними
+        registration_status = await asyncio.shield(self._request_status(telegram_id))
+        
+        # Дальше до return нет await, поэтому повторной проверки достаточно:
+        # сессию могли создать, пока мы ждали статус
+        session = self._touch_session(telegram_id)
+        if session is not None:
+            return session
+        
+        self._inserts_since_sweep += 1
+        if self._inserts_since_sweep >= self.SWEEP_EVERY:
+            self._inserts_since_sweep = 0
+            self._evict_expired()
+        
+        while len(self.sessions) >= self.MAX_SESSIONS:
+            self.sessions.popitem(last=False)
+        
+        session = UserSession(
+            telegram_id=telegram_id,
+            current_context=UserContext.IDLE,
+            last_action=None,
+            last_message_time=time.monotonic(),
+            consecutive_errors=0,
+            registration_status=registration_status
+        )
+        self.sessions[telegram_id] = session
+        
+        # Отложенные изменения применяем сразу при вставке, до следующего await:
+        # иначе более позднее изменение успело бы примениться раньше них
+        for pending_apply, pending_args in self._deferred.pop(telegram_id, ()):
+            pending_apply(session, *pending_args)
+        
+        return session
+    
+    def _touch_session(self, telegram_id: int) -> Optional[UserSession]:
+        """Вернуть действующую сессию, отметив ее активной; устаревшую удалить"""
+        session = self.sessions.get(telegram_id)
+        if session is None:
+            return None
+        now = time.monotonic()
+        if now - session.last_message_time > self.SESSION_TTL_SECONDS:
+            del self.sessions[telegram_id]
+            return None
+        # Обращение продлевает жизнь сессии и переносит ее в конец LRU-очереди
+        session.last_message_time = now
+        self.sessions.move_to_end(telegram_id)
+        return session
+    
+    def peek_session(self, telegram_id: int) -> Optional[UserSession]:
+        """Вернуть сессию только для чтения, не создавая ее и не меняя порядок LRU"""
+        return self.sessions.get(telegram_id)
+    
+    def _get_session_sync(self, telegram_id: int) -> Optional[UserSession]:
+        """Вернуть существующую сессию без обращения к БД"""
+        return self._touch_session(telegram_id)
+    
+    def _with_session(self, telegram_id: int, apply: Callable[..., None], *args: Any) -> None:
+        """Применить изменение к сессии: сразу, если она есть, иначе после создания"""
+        session = self._get_session_sync(telegram_id)
+        if session is not None:
+            apply(session, *args)
+            return
+        
+        deferred = self._deferred.get(telegram_id)
+        if deferred is not None:
+            # Сессия уже создается: присоединяемся к той же задаче
+            deferred.append((apply, args))
+            return
+        self._deferred[telegram_id] = [(apply, args)]
+        
+        async def create_session() -> None:
+            # Отложенные изменения применяет get_or_create_session при вставке сессии
+            try:
+                await self.get_or_create_session(telegram_id)
+            except Exception as e:
+                self._deferred.pop(telegram_id, None)
+                logger.warning(f"Failed to create session for user {telegram_id}: {e}")
         
-        # Добавляем в breadcrumbs если контекст изменился
+        self._track(asyncio.ensure_future(create_session()))
+    
+    def _track(self, task: asyncio.Task) -> None:
+        """Удерживать ссылку на фоновую задачу до ее завершения"""
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    def _request_status(self, telegram_id: int) -> asyncio.Future:
+        """Поставить запрос статуса в очередь ближайшей пачки"""
+        future = self._pending_status.get(telegram_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._pending_status[telegram_id] = future
+            if self._status_flush_handle is None:
+                self._status_flush_handle = loop.call_later(
+                    self.STATUS_BATCH_DELAY, self._flush_statuses
+                )
+        return future
+    
+    def _flush_statuses(self) -> None:
+        """Отправить накопленные запросы статуса одним запросом к БД"""
+        self._status_flush_handle = None
+        pending, self._pending_status = self._pending_status, {}
+        self._track(asyncio.ensure_future(self._resolve_statuses(pending)))
+    
+    async def _resolve_statuses(self, pending: Dict[int, asyncio.Future]) -> None:
+        """Получить статусы пачкой и раздать результаты ожидающим"""
+        try:
+            statuses = await get_participant_statuses(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for telegram_id, future in pending.items():
+            if not future.done():
+                future.set_result(statuses.get(telegram_id))
+    
+    def _evict_expired(self) -> None:
+        """Удалить устаревшие сессии с начала LRU-очереди"""
+        cutoff = time.monotonic() - self.SESSION_TTL_SECONDS
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_message_time >= cutoff:
+                break
+            self.sessions.popitem(last=False)
+    
+    def update_context(self, telegram_id: int, context: UserContext, action: UserAction = None):
+        """Обновить контекст пользователя"""
+        self._with_session(telegram_id, self._apply_context, context, action)
+    
+    @staticmethod
+    def _apply_context(session: UserSession, context: UserContext, action: Optional[UserAction]) -> None:
+        # Добавляем в breadcrumbs если контекст изменился (длина истории ограничена deque)
         if session.current_context != context:
             session.breadcrumbs.append(f"{session.current_context.value}→{context.value}")
-            # Ограничиваем историю
-            if len(session.breadcrumbs) > 10:
-                session.breadcrumbs = session.breadcrumbs[-10:]
         
         session.current_context = context
         session.last_action = action
-        session.last_message_time = datetime.now()
+        session.last_message_time = time.monotonic()
         
         # Сбрасываем счетчик ошибок при успешном действии
         if action and action != UserAction.UNEXPECTED:
             session.consecutive_errors = 0
     
-    async def detect_user_confusion(self, telegram_id: int, message: types.Message, state: FSMContext) -> bool:
-        """Определить, запутался ли пользователь"""
-        session = await self.get_or_create_session(telegram_id)
+    async def detect_user_confusion(self, session: Optional[UserSession], message: types.Message, state: FSMContext) -> bool:
+        """Определить, запутался ли пользователь.
+        
+        Сессию передает вызывающий код (см. peek_session); None - новый пользователь.
+        """
         current_state = await state.get_state()
         
         confusion_indicators = 0
         
         # 1. Много ошибок подряд
-        if session.consecutive_errors >= 2:
+        if session is not None and session.consecutive_errors >= 2:
             confusion_indicators += 2
             
         # 2. Отправляет неподходящий тип контента
@@ -113,18 +316,17 @@ class ContextManager:
         if current_state:
             if "enter_name" in current_state and (message.photo or message.contact):
                 confusion_indicators += 1
-            elif "upload_photo" in current_state and message.text and not any(word in text.lower() for word in ["фото", "галер", "камер"]):
+            elif "upload_photo" in current_state and message.text and not _PHOTO_HINT_RE.search(text):
                 confusion_indicators += 1
         
         # 3. Повторяет одно и то же действие
-        if len(session.breadcrumbs) >= 3:
-            recent_actions = session.breadcrumbs[-3:]
+        if session is not None and len(session.breadcrumbs) >= 3:
+            recent_actions = islice(reversed(session.breadcrumbs), 3)
             if len(set(recent_actions)) == 1:  # Все действия одинаковые
                 confusion_indicators += 1
         
         # 4. Отправляет общие фразы в специфическом контексте
-        generic_phrases = ["что", "как", "помоги", "не понимаю", "не работает", "???", "хелп", "help"]
-        if any(phrase in text.lower() for phrase in generic_phrases):
+        if _GENERIC_PHRASES_RE.search(text):
             confusion_indicators += 1
         
         return confusion_indicators >= 2
@@ -136,101 +338,50 @@ class ContextManager:
         
         # Анализируем контекст и предлагаем следующие шаги
         if current_state:
-            if "enter_name" in current_state:
-                return {
-                    "context": "registration_name",
-                    "message": "🤔 Кажется, вы застряли на вводе имени!\n\n✨ Подсказка: введите ваше полное имя как в паспорте, например: **Иванов Иван Иванович**",
-                    "quick_actions": ["⬅️ Вернуться в меню", "❓ Что такое полное имя?"],
-                    "next_step_hint": "После имени мы попросим ваш номер телефона 📱"
-                }
-            elif "enter_phone" in current_state:
-                return {
-                    "context": "registration_phone", 
-                    "message": "📱 Давайте разберемся с номером телефона!\n\n🎯 Два простых способа:\n• Нажать **📞 Отправить мой номер**\n• Или написать в формате **+79001234567**",
-                    "quick_actions": ["📞 Отправить контакт", "⬅️ К имени", "🏠 В меню"],
-                    "next_step_hint": "Далее понадобится номер карты лояльности 💳"
-                }
-            elif "upload_photo" in current_state:
-                return {
-                    "context": "registration_photo",
-                    "message": "📸 Последний шаг - фото лифлета!\n\n🎨 **Лифлет** - это рекламная листовка или баннер мероприятия\n\n✅ Попробуйте:\n• **📷 Сделать фото** прямо сейчас\n• **🖼️ Выбрать из галереи**",
-                    "quick_actions": ["📷 Камера", "🖼️ Галерея", "❓ Что такое лифлет?"],
-                    "next_step_hint": "После фото заявка отправится на модерацию! 🎉"
-                }
-            elif "entering_message" in current_state:
-                return {
-                    "context": "support_message",
-                    "message": "💬 Создаем обращение в поддержку!\n\n📝 **Опишите проблему** - чем подробнее, тем быстрее поможем\n\n📎 Можете приложить фото или документ для наглядности",
-                    "quick_actions": ["📷 Добавить фото", "📄 Добавить файл", "✅ Отправить"],
-                    "next_step_hint": "Наша команда ответит в течение 24 часов ⏰"
-                }
+            suggestion = _SUGGESTION_BY_STATE_KEY.get(current_state.rsplit(":", 1)[-1])
+            if suggestion is not None:
+                return suggestion
         
         # Контекстные подсказки для разных ситуаций
         if session.registration_status is None:
-            return {
-                "context": "new_user",
-                "message": "👋 Добро пожаловать!\n\n🎯 Начните с **🚀 Начать регистрацию** для участия в розыгрыше\n\n🔍 Или изучите **📊 О розыгрыше** чтобы узнать больше",
-                "quick_actions": ["🚀 Регистрация", "📊 О розыгрыше", "💬 Поддержка"],
-                "next_step_hint": "Регистрация займет всего 2-3 минуты! ⚡"
-            }
+            return _NEW_USER_SUGGESTION
         
         return None
     
-    async def increment_error_count(self, telegram_id: int):
+    def increment_error_count(self, telegram_id: int):
         """Увеличить счетчик ошибок"""
-        session = await self.get_or_create_session(telegram_id)
+        self._with_session(telegram_id, self._bump_errors)
+    
+    @staticmethod
+    def _bump_errors(session: UserSession) -> None:
         session.consecutive_errors += 1
     
-    async def add_hint_shown(self, telegram_id: int, hint_id: str):
+    def add_hint_shown(self, telegram_id: int, hint_id: str):
         """Отметить показанную подсказку"""
-        session = await self.get_or_create_session(telegram_id)
-        if hint_id not in session.hints_shown:
-            session.hints_shown.append(hint_id)
+        self._with_session(telegram_id, self._mark_hint, hint_id)
+    
+    @staticmethod
+    def _mark_hint(session: UserSession, hint_id: str) -> None:
+        session.hints_shown.add(hint_id)
     
-    async def should_show_hint(self, telegram_id: int, hint_id: str) -> bool:
+    def should_show_hint(self, telegram_id: int, hint_id: str) -> bool:
         """Проверить, нужно ли показать подсказку"""
-        session = await self.get_or_create_session(telegram_id)
-        return hint_id not in session.hints_shown
+        session = self._get_session_sync(telegram_id)
+        # У новой сессии подсказок еще не было
+        return session is None or hint_id not in session.hints_shown
     
-    def get_witty_responses(self) -> Dict[str, List[str]]:
+    def get_witty_responses(self) -> Mapping[str, Tuple[str, ...]]:
         """Остроумные ответы для разных ситуаций"""
-        return {
-            "sticker_in_registration": [
-                "😄 Отличный стикер! Но сейчас мне нужно ваше имя текстом - стикеры я пока не умею читать 🤖",
-                "🎨 Красиво! А теперь давайте познакомимся через имя в текстовом формате",
-                "😊 Стикер принят с благодарностью! Но для регистрации нужно старомодное текстовое имя"
-            ],
-            "voice_unexpected": [
-                "🎙️ Голос отличный! Но я лучше читаю, чем слушаю - напишите, пожалуйста, текстом",
-                "🔊 Интересно звучит! К сожалению, мои уши пока в разработке - текст предпочтительнее",
-                "🎵 Музыка для моих схем! Но давайте переключимся на письменное общение"
-            ],
-            "confusion_general": [
-                "🤔 Кажется, мы немного запутались! Ничего страшного - такое бывает с каждым",
-                "🧭 Похоже, мы свернули не туда. Давайте я покажу правильную дорогу!",
-                "🔄 Небольшая навигационная заминка? Это нормально! Сейчас все исправим"
-            ],
-            "wrong_content_type": [
-                "📎 Вижу, что вы отправили {content_type}! Но сейчас лучше подойдет {expected_type}",
-                "🎯 {content_type} получен, но для этого шага нужен {expected_type}. Попробуем еще раз?",
-                "🔄 {content_type} - хорошая попытка! Но давайте попробуем {expected_type}"
-            ]
-        }
-
-
-# Глобальный экземпляр менеджера - инициализируется позже
-context_manager = None
+        return _WITTY_RESPONSES
+
+
+# Глобальный экземпляр менеджера
+context_manager = ContextManager()
 
 def get_context_manager():
     """Получить глобальный экземпляр контекст менеджера"""
-    global context_manager
-    if context_manager is None:
-        context_manager = ContextManager()
     return context_manager
 
 def init_context_manager():
-    """Инициализация менеджера контекста после инициализации кеша"""
-    global context_manager
-    if context_manager is None:
-        context_manager = ContextManager()
+    """Совместимость: менеджер создается при импорте модуля"""
     return context_manager
@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import logging
 from functools import wraps
-from typing import Callable, Any
+from typing import Callable, Any, Optional, Tuple
 
 from aiogram import types
 from aiogram.fsm.context import FSMContext
@@ -12,6 +13,37 @@ from core import get_logger
 
 logger = get_logger(__name__)
 
+# Шаблоны ответов об ошибках
+_VALIDATION_TMPL = (
+    "❌ **Неверный формат: {field_name}**\n\n"
+    "📐 Ожидается: {expected_format}\n"
+    "✅ Пример: {example}\n\n"
+    "💡 Попробуйте еще раз"
+)
+
+_RATE_LIMIT_TEXT = (
+    "⏱️ **Слишком много запросов**\n\n"
+    "Пожалуйста, подождите несколько секунд и попробуйте снова.\n\n"
+    "💡 Мы защищаем систему от перегрузки."
+)
+
+_DATABASE_ERROR_TEXT = (
+    "💾 **Временные проблемы с базой данных**\n\n"
+    "Мы уже работаем над устранением проблемы.\n"
+    "Попробуйте через несколько минут.\n\n"
+    "💡 Ваши данные в безопасности."
+)
+
+
+def _extract_event_meta(obj: Any) -> Tuple[Optional[types.Message], Optional[int], Optional[int]]:
+    """Вернуть (событие для ответа, user_id, chat_id) для Message/CallbackQuery."""
+    if isinstance(obj, types.Message):
+        return obj, obj.from_user.id, obj.chat.id
+    if isinstance(obj, types.CallbackQuery):
+        message = obj.message
+        return message, obj.from_user.id, message.chat.id
+    return None, None, None
+
 
 def handle_bot_errors(
     error_message: str = "Произошла ошибка",
@@ -35,33 +67,25 @@ def handle_bot_errors(
                 return await func(self, message_or_callback, *args, **kwargs)
             except Exception as e:
                 # Определяем тип события
-                if isinstance(message_or_callback, types.Message):
-                    event = message_or_callback
-                    user_id = event.from_user.id
-                    chat_id = event.chat.id
-                elif isinstance(message_or_callback, types.CallbackQuery):
-                    event = message_or_callback.message
-                    user_id = message_or_callback.from_user.id
-                    chat_id = message_or_callback.message.chat.id
-                else:
-                    event = None
-                    user_id = None
-                    chat_id = None
-                
-                # Логируем ошибку с контекстом
-                log_extra = {}
-                if log_context:
-                    log_extra = {
-                        "handler": func.__name__,
-                        "user_id": user_id,
-                        "chat_id": chat_id,
-                    }
+                event, user_id, chat_id = _extract_event_meta(message_or_callback)
                 
-                logger.error(
-                    f"Error in {func.__name__}: {e}",
-                    exc_info=True,
-                    extra=log_extra
-                )
+                # Логируем ошибку с контекстом (трейсбек собирается только если ERROR включен)
+                if logger.isEnabledFor(logging.ERROR):
+                    log_extra = {}
+                    if log_context:
+                        log_extra = {
+                            "handler": func.__name__,
+                            "user_id": user_id,
+                            "chat_id": chat_id,
+                        }
+                    
+                    logger.error(
+                        "Error in %s: %s",
+                        func.__name__,
+                        e,
+                        exc_info=True,
+                        extra=log_extra
+                    )
                 
                 # Отправляем сообщение пользователю
                 if event:
@@ -73,7 +97,7 @@ def handle_bot_errors(
                             parse_mode="Markdown"
                         )
                     except Exception as send_error:
-                        logger.error(f"Failed to send error message: {send_error}")
+                        logger.error("Failed to send error message: %s", send_error)
                 
         return wrapper
     return decorator
@@ -96,10 +120,11 @@ async def handle_validation_error(
         keyboard: Клавиатура для повтора
     """
     await message.answer(
-        f"❌ **Неверный формат: {field_name}**\n\n"
-        f"📐 Ожидается: {expected_format}\n"
-        f"✅ Пример: {example}\n\n"
-        f"💡 Попробуйте еще раз",
+        _VALIDATION_TMPL.format_map({
+            "field_name": field_name,
+            "expected_format": expected_format,
+            "example": example,
+        }),
         reply_markup=keyboard,
         parse_mode="Markdown"
     )
@@ -107,28 +132,19 @@ async def handle_validation_error(
 
 async def handle_rate_limit_error(message: types.Message):
     """Обработать ошибку превышения rate limit."""
-    await message.answer(
-        "⏱️ **Слишком много запросов**\n\n"
-        "Пожалуйста, подождите несколько секунд и попробуйте снова.\n\n"
-        "💡 Мы защищаем систему от перегрузки.",
-        parse_mode="Markdown"
-    )
+    await message.answer(_RATE_LIMIT_TEXT, parse_mode="Markdown")
 
 
 async def handle_database_error(message: types.Message):
     """Обработать ошибку базы данных."""
-    await message.answer(
-        "💾 **Временные проблемы с базой данных**\n\n"
-        "Мы уже работаем над устранением проблемы.\n"
-        "Попробуйте через несколько минут.\n\n"
-        "💡 Ваши данные в безопасности.",
-        parse_mode="Markdown"
-    )
+    await message.answer(_DATABASE_ERROR_TEXT, parse_mode="Markdown")
 
 
 class ErrorContext:
     """Контекст для сбора информации об ошибках."""
     
+    __slots__ = ("errors", "warnings")
+    
     def __init__(self):
         self.errors = []
         self.warnings = []
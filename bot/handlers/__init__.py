@@ -1,13 +1,19 @@
 """Aggregate bot handlers for dispatch registration."""
 
-from .registration import RegistrationHandler, setup_registration_handlers
-from .support import setup_support_handlers
-from .common import setup_common_handlers
-from .global_commands import setup_global_commands
-from .fallback_fixed import setup_fixed_fallback_handlers
+from importlib import import_module
+
+# Handler modules are imported lazily on first attribute access (PEP 562)
+_LAZY_EXPORTS = {
+    "RegistrationHandler": ".registration",
+    "setup_registration_handlers": ".registration",
+    "setup_support_handlers": ".support",
+    "setup_common_handlers": ".common",
+    "setup_global_commands": ".global_commands",
+    "setup_fixed_fallback_handlers": ".fallback_fixed",
+}
 
 __all__ = [
-    "RegistrationHandler", 
+    "RegistrationHandler",
     "setup_registration_handlers",
     "setup_support_handlers",
     "setup_common_handlers",
@@ -15,3 +21,15 @@ __all__ = [
     "setup_fixed_fallback_handlers",
 ]
 
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
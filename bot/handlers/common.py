@@ -1,42 +1,161 @@
 """Common bot commands and informational handlers."""
 
+import asyncio
+from pathlib import Path
+from typing import Optional
+
 from aiogram import F, Router, types
+from aiogram.enums import ParseMode
+from aiogram.fsm.context import FSMContext
+from aiogram.types import FSInputFile
+from cachetools import TTLCache
 
-from bot.keyboards import get_info_menu_keyboard, get_support_menu_keyboard
+from bot.callbacks import LEGACY_INFO_SECTIONS, InfoCallback, InfoSection
+from bot.keyboards import get_info_menu_keyboard, get_status_keyboard, get_support_menu_keyboard
 from bot.context_manager import get_context_manager, UserContext, UserAction
+from bot.handlers.registration import get_registration_handler
 from bot.messages import smart_messages
 from database.repositories import get_participant_status
+from services.cache import get_cache
+
+# Тексты кнопок, по которым срабатывают обработчики (frozenset - поиск O(1))
+HELP_TEXTS = frozenset({"❓ Помощь", "💬 Помощь", "💬 Техподдержка", "💬 Поддержка"})
+STATUS_TEXTS = frozenset({"📋 Мой статус", "✅ Мой статус", "⏳ Мой статус", "❌ Мой статус", "🔄 Обновить статус"})
+
+_STATUS_LABEL = {
+    "pending": "⏳ На модерации",
+    "approved": "✅ Одобрена",
+    "rejected": "❌ Отклонена",
+}
+
+_STATUS_DETAIL = {
+    "approved": "🎉 Поздравляем! Вы участвуете в розыгрыше!",
+    "pending": "⏳ Ваша заявка проверяется модераторами.",
+    "rejected": "❌ К сожалению, заявка отклонена. Обратитесь в поддержку.",
+}
+
+# Готовые ответы на проверку статуса, собранные один раз при импорте
+_STATUS_REPLY = {
+    status: "".join(("✅ Ваш статус участия: ", label, "\n\n", _STATUS_DETAIL[status]))
+    for status, label in _STATUS_LABEL.items()
+}
+_UNKNOWN_STATUS_REPLY = "✅ Ваш статус участия: ❓ Неизвестен\n\n"
+
+_RESULTS_MOVED_NOTICE = (
+    "🔄 Эта функция была обновлена!\n\n"
+    "Теперь для получения информации о результатах используйте:\n"
+    "💬 Помощь → 📋 Часто задаваемые вопросы → 🕐 Когда будут результаты?\n\n"
+)
+
+_RULES_PDF_PATH = "Правила_Игры.pdf"
+
+_INFO_MENU_TEXT = (
+    "🎉 О нашем розыгрыше\n\n"
+    "ℹ️ Выберите раздел для подробной информации:"
+)
+
+# Кнопка "Назад" для возврата к меню "О розыгрыше"
+_BACK_KEYBOARD = types.InlineKeyboardMarkup(inline_keyboard=[
+    [types.InlineKeyboardButton(text="⬅️ Назад к меню", callback_data=InfoCallback(section=InfoSection.BACK).pack())]
+])
+
+# Последний показанный раздел для (chat_id, message_id): повторное нажатие
+# той же кнопки не отправляет лишний edit в Telegram
+_last_info_edit: TTLCache = TTLCache(maxsize=10000, ttl=60)
+
+# Тексты разделов "О розыгрыше" (MarkdownV2), индекс - InfoSection
+_INFO_TEXTS = (
+    None,  # InfoSection.BACK - показывается меню
+    (
+        "🗒 *Правила участия в розыгрыше*\n\n"
+        "→ Всего необходимо собрать *15 стикеров*\n"
+        "→ Соберите все стикеры и приклейте на карту, сделайте фото и загрузите фото в чат\\-бот\n"
+        "→ Получите шанс выиграть путешествие на Байкал или сертификат номиналом 200\\.000"
+    ),
+    (
+        "✅ *Как получить стикеры:*\n\n"
+        "Совершайте покупки с картой лояльности Магнолии одним из способов:\n\n"
+        "• Оплачивайте улыбкой со SberPay от 500 ₽\n"
+        "• Или совершайте покупку от 1500 ₽ \\(обязательно с товаром бренда\\-партнёра\\)\n\n"
+        "За каждую подходящую покупку вы получаете 3D\\-стикер с достопримечательностью Байкала\\."
+    ),
+    (
+        "✏️ *Как участвовать в розыгрыше:*\n\n"
+        "Соберите все стикеры и заполните ими лифлет полностью\\. Затем в этом боте укажите свои реальные данные и загрузите фото лифлета со всеми приклеенными стикерами\\.\n\n"
+        "Победители определяются среди участников, собравших полную коллекцию\\!\n\n"
+        "⚠️ *Важно:*\n"
+        "Для участия в розыгрыше главного приза необходимо оплатить покупки улыбкой со SberPay\\.\n"
+        "Сертификат номиналом 200\\.000 рублей получают при покупке у партнерских брендов независимо от способа оплаты"
+    ),
+    (
+        "🏆 *Приз розыгрыша*\n\n"
+        "Главный приз — *путешествие на Байкал* — выдается только при оплате покупок улыбкой со SberPay\\.\n\n"
+        "При покупке товаров у брендов\\-партнеров участникам выдается другой приз — *сертификат номиналом 200\\.000 рублей*\\*\n\n"
+        "\\*Важно, что для участия в розыгрыше главного приза необходимо оплатить покупки улыбкой со SberPay\\.\n"
+        "Сертификат номиналом 200\\.000 рублей получают при покупке у партнерских брендов независимо от способа оплаты\\.\n\n"
+        "🏔️ *Ваше приключение начинается здесь\\!*"
+    ),
+    (
+        "📅 *Сроки проведения акции*\n\n"
+        "Акция «Путешествие по Москве» проходит с *15 октября по 15 декабря 2025 года*\\."
+    ),
+    (
+        "😊 *Как подключить оплату улыбкой со SberPay по Сбер ID*\n\n"
+        "Оплата улыбкой доступна всем клиентам, которые подключили сервис в личном кабинете Сбер ID:\n\n"
+        "→ Войти или создать по номеру телефона\n"
+        "→ Настроить «Безопасность», нажать «Настроить» в карточке «Оплата улыбкой»\n"
+        "→ Привязать карту любого банка, создать код безопасности\n\n"
+        "📖 Подробная информация о порядке подключения, условиях использования Участником Акции SberPay с использованием Биометрического метода аутентификации \\(Оплата улыбкой\\), ограничениях, размещена на:\n"
+        "https://www\\.sberbank\\.com/ru/person/payments/sberpay/oplata\\-ulybkoi"
+    ),
+    (
+        "📱 *Как подключить оплату улыбкой со SberPay через мобильное приложение*\n\n"
+        "Оплата улыбкой доступна всем клиентам, которые подключили сервис в мобильном приложении Сбера:\n\n"
+        "→ Ввести в поиске «Оплата улыбкой», следовать инструкции\n"
+        "→ Привязать карту любого банка, создать код безопасности\n\n"
+        "📖 Подробная информация о порядке подключения, условиях использования Участником Акции SberPay с использованием Биометрического метода аутентификации \\(Оплата улыбкой\\), ограничениях, размещена на:\n"
+        "https://www\\.sberbank\\.com/ru/person/payments/sberpay/oplata\\-ulybkoi"
+    ),
+)
 
 
 class CommonHandlers:
     def __init__(self) -> None:
         self.router = Router()
+        # file_id загруженного PDF с правилами (после первой отправки)
+        self._rules_pdf_file_id: Optional[str] = None
         self._register()
 
     def setup(self, dispatcher) -> None:
-        dispatcher.include_router(self.router)
+        # Повторный вызов не подключает роутер второй раз
+        if self.router.parent_router is None:
+            dispatcher.include_router(self.router)
 
     def _register(self) -> None:
         # REMOVED: Command("start") - теперь в global_commands.py
-        self.router.message.register(self.help_and_support_handler, F.text.in_(["❓ Помощь", "💬 Помощь", "💬 Техподдержка", "💬 Поддержка"]))
-        self.router.message.register(self.status_handler, F.text.in_(["📋 Мой статус", "✅ Мой статус", "⏳ Мой статус", "❌ Мой статус", "🔄 Обновить статус"]))
+        self.router.message.register(self.help_and_support_handler, F.text.in_(HELP_TEXTS))
+        self.router.message.register(self.status_handler, F.text.in_(STATUS_TEXTS))
         # Обработчик для повторной подачи заявки
         self.router.message.register(self.restart_registration, F.text == "🔄 Подать заявку снова")
         # Обработчик для кнопки "О розыгрыше"
         self.router.message.register(self.show_info_menu, F.text == "📊 О розыгрыше")
         # Обработчик для старых результатов - перенаправляем на помощь
         self.router.message.register(self.handle_results_redirect, F.text == "🏆 Результаты")
-        self.router.callback_query.register(self.handle_info_callback, F.data.startswith("info_"))
+        self.router.callback_query.register(self.handle_info_callback, InfoCallback.filter())
+        # Кнопки из клавиатур, отправленных до перехода на InfoCallback
+        self.router.callback_query.register(self.handle_legacy_info_callback, F.data.startswith("info_"))
 
     # REMOVED: start method - теперь в global_commands.py
 
     async def help_and_support_handler(self, message: types.Message) -> None:
         """Объединенный обработчик помощи и техподдержки - перенаправляем в support handler"""
-        from bot.messages import smart_messages
-        
+        await self._send_support_menu(message)
+    
+    async def _send_support_menu(self, message: types.Message, notice: str = "") -> None:
+        """Показать меню поддержки; notice добавляется в начало того же сообщения"""
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.SUPPORT,
                 UserAction.BUTTON_CLICK
@@ -47,199 +166,153 @@ class CommonHandlers:
         
         keyboard = get_support_menu_keyboard()
         await message.answer(
-            menu_msg["text"],
+            notice + menu_msg["text"],
             reply_markup=keyboard,
-            parse_mode="Markdown"
+            parse_mode=ParseMode.MARKDOWN
         )
     
     async def status_handler(self, message: types.Message) -> None:
         """Обработчик проверки статуса участника"""
-        from bot.keyboards.main_menu import get_status_keyboard
-        
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
             )
         
-        # Проверяем статус участника
-        status = await get_participant_status(message.from_user.id)
+        # Проверяем статус участника; повторные нажатия обслуживает hot-кэш
+        # (ключ сбрасывается регистрацией при записи заявки)
+        user_id = message.from_user.id
+        
+        async def loader():
+            return await get_participant_status(user_id)
+        
+        status = await get_cache().get_or_set(
+            key=f"status:{user_id}",
+            loader=loader,
+            level="hot",
+        )
         
         if status:
-            status_text = {
-                "pending": "⏳ На модерации",
-                "approved": "✅ Одобрена", 
-                "rejected": "❌ Отклонена"
-            }.get(status, "❓ Неизвестен")
-            
-            text = f"✅ Ваш статус участия: {status_text}\n\n"
-            
-            if status == "approved":
-                text += "🎉 Поздравляем! Вы участвуете в розыгрыше!"
-            elif status == "pending":
-                text += "⏳ Ваша заявка проверяется модераторами."
-            elif status == "rejected":
-                text += "❌ К сожалению, заявка отклонена. Обратитесь в поддержку."
+            text = _STATUS_REPLY.get(status, _UNKNOWN_STATUS_REPLY)
         else:
             text = "❓ Вы еще не подавали заявку на участие.\n\n🚀 Нажмите 'Начать регистрацию' для участия в розыгрыше!"
             
         await message.answer(text, reply_markup=get_status_keyboard())
 
-    async def restart_registration(self, message: types.Message, state) -> None:
+    async def restart_registration(self, message: types.Message, state: FSMContext) -> None:
         """Обработчик повторной подачи заявки"""
-        from bot.handlers.registration import RegistrationHandler
-        from pathlib import Path
-        from services.cache import get_cache
-        from aiogram.fsm.context import FSMContext
-        
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.REGISTRATION,
                 UserAction.BUTTON_CLICK
             )
         
-        # Создаем экземпляр обработчика регистрации и запускаем процесс
-        registration_handler = RegistrationHandler(
-            upload_dir=Path("uploads"),
-            cache=get_cache(),
-            bot=None  # Не нужен для этого действия
-        )
+        # Используем уже зарегистрированный обработчик: новый экземпляр создавал бы
+        # свой Router и фоновую задачу сброса батча на каждое нажатие
+        registration_handler = get_registration_handler()
         
         # КРИТИЧЕСКИ ВАЖНО: Передаем state, чтобы обработчик мог установить состояние enter_name
         await registration_handler.start_registration(message, state)
 
     async def handle_results_redirect(self, message: types.Message) -> None:
-        """Перенаправление старой кнопки результатов на помощь"""
-        await message.answer(
-            "🔄 Эта функция была обновлена!\n\n"
-            "Теперь для получения информации о результатах используйте:\n"
-            "💬 Помощь → 📋 Часто задаваемые вопросы → 🕐 Когда будут результаты?"
-        )
-        await self.help_and_support_handler(message)
+        """Перенаправление старой кнопки результатов на помощь (одним сообщением)"""
+        await self._send_support_menu(message, notice=_RESULTS_MOVED_NOTICE)
 
     async def show_info_menu(self, message: types.Message) -> None:
-        from aiogram.types import FSInputFile
-        from pathlib import Path
+        text = _INFO_MENU_TEXT
         
-        text = (
-            "🎉 О нашем розыгрыше\n\n"
-            "ℹ️ Выберите раздел для подробной информации:"
-        )
+        # Прикрепляем PDF файл с правилами: загружаем один раз, дальше
+        # отправляем по file_id без повторной передачи содержимого файла
+        if self._rules_pdf_file_id is not None:
+            await message.answer_document(
+                document=self._rules_pdf_file_id,
+                caption=text,
+                reply_markup=get_info_menu_keyboard()
+            )
+            return
         
-        # Прикрепляем PDF файл с правилами
-        pdf_path = Path("Правила_Игры.pdf")
+        pdf_path = Path(_RULES_PDF_PATH)
         if pdf_path.exists():
             pdf_file = FSInputFile(pdf_path)
-            await message.answer_document(
+            sent = await message.answer_document(
                 document=pdf_file,
                 caption=text,
                 reply_markup=get_info_menu_keyboard()
             )
+            if sent.document:
+                self._rules_pdf_file_id = sent.document.file_id
         else:
             # Если файл не найден, отправляем только текст
             await message.answer(text, reply_markup=get_info_menu_keyboard())
 
-    async def handle_info_callback(self, callback: types.CallbackQuery) -> None:
+    async def handle_info_callback(self, callback: types.CallbackQuery, callback_data: InfoCallback) -> None:
+        await self._show_info_section(callback, callback_data.section)
+
+    async def handle_legacy_info_callback(self, callback: types.CallbackQuery) -> None:
+        await self._show_info_section(callback, LEGACY_INFO_SECTIONS.get(callback.data))
+
+    async def _show_info_section(self, callback: types.CallbackQuery, section: Optional[InfoSection]) -> None:
+        edit_key = (callback.message.chat.id, callback.message.message_id)
+        if section is not None and _last_info_edit.get(edit_key) == section:
+            # Сообщение уже показывает этот раздел
+            await callback.answer()
+            return
+        
         # Если нажата кнопка "Назад к меню О розыгрыше"
-        if callback.data == "info_back":
-            text = (
-                "🎉 О нашем розыгрыше\n\n"
-                "ℹ️ Выберите раздел для подробной информации:"
-            )
+        if section is InfoSection.BACK:
+            text = _INFO_MENU_TEXT
             # Проверяем, есть ли документ в сообщении (PDF был прикреплен)
             if callback.message.document:
                 # Если это сообщение с документом, редактируем caption
-                await callback.message.edit_caption(caption=text, reply_markup=get_info_menu_keyboard())
+                edit = callback.message.edit_caption(caption=text, reply_markup=get_info_menu_keyboard())
             else:
                 # Если это обычное текстовое сообщение
-                await callback.message.edit_text(text, reply_markup=get_info_menu_keyboard())
-            await callback.answer()
-            return
-        
-        mapping = {
-            "info_rules": (
-                "🗒 *Правила участия в розыгрыше*\n\n"
-                "→ Всего необходимо собрать *15 стикеров*\n"
-                "→ Соберите все стикеры и приклейте на карту, сделайте фото и загрузите фото в чат\\-бот\n"
-                "→ Получите шанс выиграть путешествие на Байкал или сертификат номиналом 200\\.000"
-            ),
-            "info_stickers": (
-                "✅ *Как получить стикеры:*\n\n"
-                "Совершайте покупки с картой лояльности Магнолии одним из способов:\n\n"
-                "• Оплачивайте улыбкой со SberPay от 500 ₽\n"
-                "• Или совершайте покупку от 1500 ₽ \\(обязательно с товаром бренда\\-партнёра\\)\n\n"
-                "За каждую подходящую покупку вы получаете 3D\\-стикер с достопримечательностью Байкала\\."
-            ),
-            "info_participate": (
-                "✏️ *Как участвовать в розыгрыше:*\n\n"
-                "Соберите все стикеры и заполните ими лифлет полностью\\. Затем в этом боте укажите свои реальные данные и загрузите фото лифлета со всеми приклеенными стикерами\\.\n\n"
-                "Победители определяются среди участников, собравших полную коллекцию\\!\n\n"
-                "⚠️ *Важно:*\n"
-                "Для участия в розыгрыше главного приза необходимо оплатить покупки улыбкой со SberPay\\.\n"
-                "Сертификат номиналом 200\\.000 рублей получают при покупке у партнерских брендов независимо от способа оплаты"
-            ),
-            "info_prizes": (
-                "🏆 *Приз розыгрыша*\n\n"
-                "Главный приз — *путешествие на Байкал* — выдается только при оплате покупок улыбкой со SberPay\\.\n\n"
-                "При покупке товаров у брендов\\-партнеров участникам выдается другой приз — *сертификат номиналом 200\\.000 рублей*\\*\n\n"
-                "\\*Важно, что для участия в розыгрыше главного приза необходимо оплатить покупки улыбкой со SberPay\\.\n"
-                "Сертификат номиналом 200\\.000 рублей получают при покупке у партнерских брендов независимо от способа оплаты\\.\n\n"
-                "🏔️ *Ваше приключение начинается здесь\\!*"
-            ),
-            "info_schedule": (
-                "📅 *Сроки проведения акции*\n\n"
-                "Акция «Путешествие по Москве» проходит с *15 октября по 15 декабря 2025 года*\\."
-            ),
-            "info_sberpay_id": (
-                "😊 *Как подключить оплату улыбкой со SberPay по Сбер ID*\n\n"
-                "Оплата улыбкой доступна всем клиентам, которые подключили сервис в личном кабинете Сбер ID:\n\n"
-                "→ Войти или создать по номеру телефона\n"
-                "→ Настроить «Безопасность», нажать «Настроить» в карточке «Оплата улыбкой»\n"
-                "→ Привязать карту любого банка, создать код безопасности\n\n"
-                "📖 Подробная информация о порядке подключения, условиях использования Участником Акции SberPay с использованием Биометрического метода аутентификации \\(Оплата улыбкой\\), ограничениях, размещена на:\n"
-                "https://www\\.sberbank\\.com/ru/person/payments/sberpay/oplata\\-ulybkoi"
-            ),
-            "info_sberpay_app": (
-                "📱 *Как подключить оплату улыбкой со SberPay через мобильное приложение*\n\n"
-                "Оплата улыбкой доступна всем клиентам, которые подключили сервис в мобильном приложении Сбера:\n\n"
-                "→ Ввести в поиске «Оплата улыбкой», следовать инструкции\n"
-                "→ Привязать карту любого банка, создать код безопасности\n\n"
-                "📖 Подробная информация о порядке подключения, условиях использования Участником Акции SberPay с использованием Биометрического метода аутентификации \\(Оплата улыбкой\\), ограничениях, размещена на:\n"
-                "https://www\\.sberbank\\.com/ru/person/payments/sberpay/oplata\\-ulybkoi"
-            ),
-        }
-        
-        # Создаем кнопку "Назад" для возврата к меню "О розыгрыше"
-        back_button = types.InlineKeyboardMarkup(inline_keyboard=[
-            [types.InlineKeyboardButton(text="⬅️ Назад к меню", callback_data="info_back")]
-        ])
-        
-        text_content = mapping.get(callback.data, "Информация недоступна.")
-        
-        # Проверяем, есть ли документ в сообщении (PDF был прикреплен)
-        if callback.message.document:
-            # Если это сообщение с документом, редактируем caption
-            await callback.message.edit_caption(
-                caption=text_content,
-                parse_mode="MarkdownV2",
-                reply_markup=back_button
-            )
+                edit = callback.message.edit_text(text, reply_markup=get_info_menu_keyboard())
         else:
-            # Если это обычное текстовое сообщение
-            await callback.message.edit_text(
-                text_content,
-                parse_mode="MarkdownV2",
-                reply_markup=back_button
-            )
-        await callback.answer()
+            text_content = _INFO_TEXTS[section] if section is not None else "Информация недоступна."
+            
+            # Проверяем, есть ли документ в сообщении (PDF был прикреплен)
+            if callback.message.document:
+                # Если это сообщение с документом, редактируем caption
+                edit = callback.message.edit_caption(
+                    caption=text_content,
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    reply_markup=_BACK_KEYBOARD
+                )
+            else:
+                # Если это обычное текстовое сообщение
+                edit = callback.message.edit_text(
+                    text_content,
+                    parse_mode=ParseMode.MARKDOWN_V2,
+                    reply_markup=_BACK_KEYBOARD
+                )
+        
+        # Снимаем "часики" с кнопки одновременно с редактированием, а не после него.
+        # Ошибка ответа на callback (например, устаревший запрос) не мешает правке
+        _, edit_result = await asyncio.gather(callback.answer(), edit, return_exceptions=True)
+        if isinstance(edit_result, BaseException):
+            raise edit_result
+        if section is not None:
+            _last_info_edit[edit_key] = section
+
+
+_common_handlers: Optional[CommonHandlers] = None
+
+
+def get_common_handlers() -> CommonHandlers:
+    """Единственный экземпляр CommonHandlers (для вызова обработчиков из других модулей)"""
+    global _common_handlers
+    if _common_handlers is None:
+        _common_handlers = CommonHandlers()
+    return _common_handlers
 
 
 def setup_common_handlers(dispatcher) -> CommonHandlers:
-    handler = CommonHandlers()
+    handler = get_common_handlers()
     handler.setup(dispatcher)
     return handler
 
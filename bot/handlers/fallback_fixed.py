@@ -2,41 +2,316 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import random
-from typing import Dict, Any
+import re
+from itertools import cycle
+from typing import Optional
 
 from aiogram import F, Router, types
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.enums import ContentType
 from aiogram.fsm.context import FSMContext
-from aiogram.filters import StateFilter
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from bot.context_manager import get_context_manager, UserContext, UserAction
+from bot.smart_keyboards import adaptive_keyboards
 from bot.states import RegistrationStates
 from bot.keyboards import (
-    get_main_menu_keyboard_for_user,
     get_support_menu_keyboard,
     get_name_input_keyboard,
     get_phone_input_keyboard,
     get_loyalty_card_keyboard,
     get_photo_upload_keyboard
 )
+from database.repositories import get_participant_status
+from services.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+# Ответы на случай, если контекст менеджер недоступен
+_DEFAULT_WITTY_RESPONSES = {
+    "sticker_in_registration": ("😊 Стикер принят! Но сейчас нужно что-то другое.",),
+    "voice_unexpected": ("🎤 Голосовое сообщение получено! Но сейчас нужен текст.",),
+    "confusion_general": ("🤔 Кажется, что-то пошло не так. Давайте начнем сначала!",),
+}
+
+# Сколько ждать проверку на запутанность перед нейтральным ответом, секунд
+_CONFUSION_CHECK_TIMEOUT = 0.5
+
+# Типы контента, которые в указанном состоянии обрабатывает регистрация
+_REGISTRATION_OWNED_CONTENT = {
+    ContentType.PHOTO: RegistrationStates.upload_photo.state,
+    ContentType.CONTACT: RegistrationStates.enter_phone.state,
+}
+
+# Состояния регистрации, в которых текст принимают обработчики регистрации
+_REGISTRATION_TEXT_STATES = frozenset({
+    RegistrationStates.enter_name.state,
+    RegistrationStates.enter_phone.state,
+    RegistrationStates.enter_loyalty_card.state,
+    RegistrationStates.upload_photo.state,
+    RegistrationStates.repeat_submission_guard.state,
+})
+
+# Названия медиа для ответов на неожиданный контент
+_MEDIA_NAMES = {
+    ContentType.VIDEO: "видео 🎥",
+    ContentType.AUDIO: "аудио 🎵",
+    ContentType.ANIMATION: "GIF 🎬",
+    ContentType.DOCUMENT: "документ 📄",
+}
+
+# Известные кнопки и команды, которые обрабатывают другие роутеры
+_KNOWN_COMMANDS = frozenset({
+    "🔄 Подать заявку снова",
+    "🚀 Начать регистрацию",
+    "📋 Мой статус",
+    "✅ Мой статус",
+    "⏳ Мой статус",
+    "❌ Мой статус",
+    "🔄 Обновить статус",
+    "❓ Помощь",
+    "💬 Помощь",
+    "💬 Техподдержка",
+    "💬 Поддержка",
+    "📊 О розыгрыше",
+    "🏆 Результаты",
+    "🆘 МЕНЮ",
+    "❌ ОТМЕНА",
+    "Назад в меню",
+    "🏠 Главное меню",
+})
+# Для частичного совпадения берем только длинные команды
+_KNOWN_COMMANDS_PARTIAL = tuple(cmd for cmd in _KNOWN_COMMANDS if len(cmd) > 5)
+
+# Ответы вне FSM (к ним добавляется главное меню)
+_MSG_UNKNOWN_TEXT = (
+    "🤔 **Не совсем понял ваш запрос.**\n\n"
+    "💡 **Попробуйте:**\n"
+    "📋 Проверить свой статус\n"
+    "📊 Узнать о розыгрыше\n"
+    "💬 Связаться с поддержкой\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+_MSG_STICKER = (
+    "😊 **Спасибо за стикер!**\n\n"
+    "🤔 Но сейчас стикеры не требуются.\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+_MSG_VOICE = (
+    "🎤 **Спасибо за голосовое сообщение!**\n\n"
+    "🤔 Но сейчас голосовые сообщения не обрабатываются.\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+_MSG_PHOTO = (
+    "📸 **Спасибо за фото!**\n\n"
+    "🤔 Но сейчас фотографии не требуются.\n\n"
+    "💡 **Что вы можете сделать:**\n"
+    "📋 Проверить свой статус участия\n"
+    "📊 Узнать о розыгрыше\n"
+    "💬 Связаться с поддержкой\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+_MSG_CONTACT = (
+    "📱 **Спасибо за контакт!**\n\n"
+    "🤔 Но сейчас контакты не требуются.\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+_MSG_LOCATION = (
+    "🗺️ **Спасибо за геолокацию!**\n\n"
+    "🤔 Но сейчас геолокация не требуется.\n\n"
+    "👇 Используйте кнопки меню ниже:"
+)
+
+# Короткие ответы перед подсказкой по текущему шагу FSM
+_MSG_PHOTO_IN_FSM = (
+    "📸 Красивое фото! Но сейчас оно не подходит для текущего шага.\n\n"
+    "🔄 Давайте разберемся, что нужно сделать:"
+)
+_MSG_CONTACT_IN_FSM = (
+    "📱 Спасибо за контакт! Но сейчас он пригодится на другом этапе.\n\n"
+    "🧭 Позвольте направить вас:"
+)
+_MSG_LOCATION_IN_FSM = (
+    "🗺️ Интересное место! Но для нашего розыгрыша геолокация не нужна.\n\n"
+    "🎯 Давайте вернемся к главному:"
+)
+
+# Ответы на неожиданный контент по типу:
+# ack - короткий ответ (или witty - ключ цикла шуточных ответов),
+# ack_outside_fsm - отвечать ли им и вне FSM, count_error - считать ли ошибкой,
+# reply - ответ вне FSM вместе с главным меню
+_STICKER_META = {"witty": "sticker_in_registration", "ack_outside_fsm": True, "count_error": True, "reply": _MSG_STICKER}
+_VOICE_META = {"witty": "voice_unexpected", "ack_outside_fsm": True, "count_error": True, "reply": _MSG_VOICE}
+_LOCATION_META = {"ack": _MSG_LOCATION_IN_FSM, "ack_outside_fsm": False, "count_error": False, "reply": _MSG_LOCATION}
+
+_CONTENT_META = {
+    ContentType.STICKER: _STICKER_META,
+    ContentType.VOICE: _VOICE_META,
+    ContentType.VIDEO_NOTE: _VOICE_META,
+    ContentType.PHOTO: {"ack": _MSG_PHOTO_IN_FSM, "ack_outside_fsm": False, "count_error": True, "reply": _MSG_PHOTO},
+    ContentType.CONTACT: {"ack": _MSG_CONTACT_IN_FSM, "ack_outside_fsm": False, "count_error": True, "reply": _MSG_CONTACT},
+    ContentType.LOCATION: _LOCATION_META,
+    ContentType.VENUE: _LOCATION_META,
+    **{
+        content_type: {
+            "ack": f"📎 {name} получен! Но в данный момент мне нужно что-то другое.\n\n"
+                   "🎯 Давайте я подскажу, что сейчас лучше отправить:",
+            "ack_outside_fsm": True,
+            "count_error": True,
+            "reply": f"📎 **{name} получен!**\n\n"
+                     "🤔 Но сейчас такие файлы не требуются.\n\n"
+                     "👇 Используйте кнопки меню ниже:",
+        }
+        for content_type, name in _MEDIA_NAMES.items()
+    },
+}
+
+# Подсказки по шагам FSM: текст, фабрика клавиатуры и подсказки
+# для неподходящего контента
+_FSM_HELP = {
+    "RegistrationStates:enter_name": {
+        "message": "📝 **Сейчас нужно ввести имя**\n\n"
+                  "✅ **Примеры:**\n"
+                  "• Алексей\n"
+                  "• Анна-Мария\n"
+                  "• Жан-Поль\n"
+                  "• О'Коннор\n\n"
+                  "❌ **Избегайте:** фамилий, отчеств, цифр, пробелов\n\n"
+                  "💡 *Введите только ваше имя*",
+        "keyboard": get_name_input_keyboard,
+        "wrong_content_hints": {
+            "phone": "📱 Телефон вы укажете на следующем шаге!",
+            "photo": "📸 Фото понадобится в конце регистрации!",
+            "contact": "📞 Контакт пригодится для телефона!"
+        }
+    },
+    "RegistrationStates:enter_phone": {
+        "message": "📱 **Сейчас нужен номер телефона**\n\n"
+                  "✅ **Два способа:**\n"
+                  "• Нажать **📞 Отправить мой номер**\n"
+                  "• Написать в формате **+79001234567**\n\n"
+                  "💡 *Используйте действующий номер*",
+        "keyboard": get_phone_input_keyboard,
+        "wrong_content_hints": {
+            "name": "✅ Имя уже сохранено! Теперь телефон.",
+            "photo": "📸 Фото будет последним шагом!"
+        }
+    },
+    "RegistrationStates:enter_loyalty_card": {
+        "message": "💳 **Сейчас нужен номер карты лояльности**\n\n"
+                  "✅ **Формат:** 13 или 16 цифр\n"
+                  "✅ **Где найти:** на лицевой стороне карты\n"
+                  "✅ **Примеры:** 1234567890123 или 1234567890123456\n\n"
+                  "💡 *Найдите карту в приложении или кошельке*",
+        "keyboard": get_loyalty_card_keyboard
+    },
+    "RegistrationStates:upload_photo": {
+        "message": "📸 **Последний шаг - фото лифлета!**\n\n"
+                  "🎨 **Лифлет** = рекламная листовка/баннер\n\n"
+                  "✅ **Как отправить:**\n"
+                  "• Нажать **📷 Сделать фото**\n"
+                  "• Нажать **🖼️ Выбрать из галереи**\n"
+                  "• Просто прислать фото сообщением\n\n"
+                  "💡 *Фото должно быть четким и читаемым*",
+        "keyboard": get_photo_upload_keyboard
+    },
+    "SupportStates:entering_message": {
+        "message": "💬 **Создание обращения в поддержку**\n\n"
+                  "✅ **Опишите проблему подробно:**\n"
+                  "• Что произошло?\n"
+                  "• На каком этапе?\n"
+                  "• Какие ошибки видите?\n\n"
+                  "📎 *Можете приложить фото или документ*",
+        "keyboard": None  # Используется клавиатура из support handler
+    }
+}
+
+# Эвристики «похоже на телефон/имя» для подсказок в режиме регистрации
+_PHONE_CLEAN = re.compile(r"[^\d+]")
+_NAME_WORD = re.compile(r"^[^\W\d_]+(?:-[^\W\d_]+)*$")
+
+_QUICK_NAV_PREFIX = "quick_nav_"
+
+_QUICK_HELP_TEXT = (
+    "❓ **БЫСТРАЯ СПРАВКА**\n\n"
+    "🚀 **Регистрация** - подать заявку на участие в розыгрыше\n"
+    "📋 **Мой статус** - проверить статус вашей заявки\n"
+    "💬 **Поддержка** - задать вопрос или сообщить о проблеме\n"
+    "📊 **О розыгрыше** - правила, призы и сроки\n\n"
+    "🎯 **Для участия нужно:**\n"
+    "1️⃣ Полное имя (как в документе)\n"
+    "2️⃣ Номер телефона\n"
+    "3️⃣ Номер карты лояльности\n"
+    "4️⃣ Фото лифлета\n\n"
+    "⚡ **Экстренные команды:**\n"
+    "• `/start` - перезапуск бота\n"
+    "• `/cancel` - отменить текущее действие\n"
+    "• `/help` - получить помощь"
+)
+
+# Быстрая навигация для запутавшихся пользователей
+_QUICK_NAV_KB = InlineKeyboardMarkup(inline_keyboard=[
+    [
+        InlineKeyboardButton(text="🏠 Главное меню", callback_data="quick_nav_main"),
+        InlineKeyboardButton(text="🚀 К регистрации", callback_data="quick_nav_register")
+    ],
+    [
+        InlineKeyboardButton(text="💬 В поддержку", callback_data="quick_nav_support"),
+        InlineKeyboardButton(text="❓ Помощь", callback_data="quick_nav_help")
+    ]
+])
+
+
+def _shuffled_cycle(responses) -> cycle:
+    """Бесконечный перебор ответов в случайном (на процесс) порядке"""
+    return cycle(random.sample(tuple(responses), len(responses)))
 
 
 class FixedSmartFallbackHandler:
     """ИСПРАВЛЕННЫЙ умный обработчик с правильной логикой FSM"""
     
+    __slots__ = (
+        "router",
+        "_ctx_mgr",
+        "_quick_nav",
+        "_witty",
+    )
+    
     def __init__(self):
         self.router = Router()
         self.router.name = "smart_fallback"
+        self._ctx_mgr = None
+        # Ответы без контекст менеджера; остроумные варианты подставляются в setup()
+        self._load_witty_responses(_DEFAULT_WITTY_RESPONSES)
         self._register_handlers()
-        self._register_quick_nav_handlers()  # Регистрируем сразу
     
     def setup(self, dispatcher) -> None:
-        # Fallback handlers должны быть последними (самый низкий приоритет)
-        # В aiogram последний зарегистрированный роутер имеет приоритет,
-        # поэтому fallback регистрируется последним, но мы все равно проверяем
-        # состояния явно в handle_unexpected_text для надежности
-        dispatcher.include_router(self.router)
+        # Fallback handlers должны быть последними (самый низкий приоритет):
+        # aiogram проверяет роутеры в порядке подключения, поэтому роутер
+        # подключается после всех остальных. Состояния регистрации все равно
+        # проверяются явно (SkipHandler, handle_unexpected_text) для надежности
+        context_manager = self._ctx()
+        if context_manager:
+            self._load_witty_responses({**_DEFAULT_WITTY_RESPONSES, **context_manager.get_witty_responses()})
+        # Повторный вызов (перезапуск инициализации) не подключает роутер второй раз
+        if self.router.parent_router is None:
+            dispatcher.include_router(self.router)
+    
+    def _load_witty_responses(self, witty) -> None:
+        """Ответы выдаются по кругу: порядок перемешивается один раз, без ГПСЧ на каждое сообщение"""
+        self._witty = {
+            key: _shuffled_cycle(witty[key])
+            for key in ("sticker_in_registration", "voice_unexpected", "confusion_general")
+        }
+    
+    def _ctx(self):
+        """Контекст менеджер (синглтон процесса), запрашивается один раз"""
+        if self._ctx_mgr is None:
+            self._ctx_mgr = get_context_manager()
+        return self._ctx_mgr
     
     def _register_handlers(self):
         """Регистрация умных fallback обработчиков"""
@@ -45,48 +320,34 @@ class FixedSmartFallbackHandler:
         # Все текстовые сообщения должны обрабатываться специфичными обработчиками
         # Это гарантирует, что кнопки и команды работают корректно
         # 
-        # Если нужно вернуть fallback для текста, можно раскомментировать:
+        # Если нужно вернуть fallback для текста, можно раскомментировать
+        # (и импортировать StateFilter из aiogram.filters):
         # self.router.message.register(
         #     self.handle_unexpected_text,
         #     F.text,
-        #     ~StateFilter(RegistrationStates.enter_name),
-        #     ~StateFilter(RegistrationStates.enter_phone),
-        #     ~StateFilter(RegistrationStates.enter_loyalty_card),
-        #     ~StateFilter(RegistrationStates.upload_photo),
-        #     ~StateFilter(RegistrationStates.repeat_submission_guard),
+        #     ~F.text.startswith("/"),  # команды не доходят до обработчика
+        #     ~F.via_bot,               # эхо inline-режима не обрабатываем
+        #     ~StateFilter(*_REGISTRATION_TEXT_STATES),
         # )
         
-        # Обработчики для разных типов контента
-        self.router.message.register(
-            self.handle_unexpected_sticker,
-            F.sticker,
-        )
-        
-        self.router.message.register(
-            self.handle_unexpected_voice,
-            F.voice | F.video_note,
-        )
-        
-        self.router.message.register(
-            self.handle_unexpected_media,
-            F.video | F.audio | F.animation | F.document,
-        )
-        
+        # Неожиданный контент: один зарегистрированный обработчик,
+        # ответы выбираются из _CONTENT_META по message.content_type
         self.router.message.register(
-            self.handle_unexpected_photo,
-            F.photo,
-            ~StateFilter(RegistrationStates.upload_photo),  # НЕ обрабатывать в состоянии upload_photo
+            self._dispatch_by_content_type,
+            F.content_type.in_(_CONTENT_META),
         )
         
-        self.router.message.register(
-            self.handle_unexpected_contact,
-            F.contact,
-            ~StateFilter(RegistrationStates.enter_phone),  # НЕ обрабатывать в состоянии enter_phone
-        )
-        
-        self.router.message.register(
-            self.handle_unexpected_location,
-            F.location | F.venue,
+        # Быстрая навигация: один обработчик по префиксу, до обработчика неизвестных callback
+        self._quick_nav = {
+            "main": self._quick_nav_main,
+            "register": self._quick_nav_register,
+            "support": self._quick_nav_support,
+            "cancel": self._quick_nav_cancel,
+            "help": self._quick_nav_help,
+        }
+        self.router.callback_query.register(
+            self._dispatch_quick_nav,
+            F.data.startswith(_QUICK_NAV_PREFIX),
         )
         
         # Обработчик для неизвестных callback queries
@@ -94,10 +355,10 @@ class FixedSmartFallbackHandler:
         # Используем отрицательные фильтры для каждого известного префикса
         self.router.callback_query.register(
             self.handle_unknown_callback,
-            ~F.data.startswith("info_"),      # Информационные кнопки (common.py)
+            ~F.data.startswith(("info_", "info:")),  # Информационные кнопки (common.py)
             ~F.data.startswith("faq_"),       # FAQ кнопки (support.py)
             ~F.data.startswith("support_"),   # Кнопки поддержки (support.py)
-            ~F.data.startswith("quick_nav_"), # Быстрая навигация (fallback_fixed.py)
+            ~F.data.startswith(_QUICK_NAV_PREFIX), # Быстрая навигация (fallback_fixed.py)
             ~F.data.startswith("edit_"),      # Редактирование данных (registration.py)
             ~F.data.startswith("confirm_"),   # Подтверждение регистрации (registration.py)
             ~F.data.startswith("cancel_"),    # Отмена регистрации (registration.py)
@@ -112,108 +373,56 @@ class FixedSmartFallbackHandler:
             F.data != "explain_leaflet",      # Объяснение лифлета (registration.py)
         )
     
-    async def handle_unexpected_text(self, message: types.Message, state: FSMContext):
+    async def _dispatch_by_content_type(
+        self,
+        message: types.Message,
+        state: FSMContext,
+        raw_state: Optional[str] = None,
+    ):
+        """Ответить на неожиданный контент по его типу"""
+        content_type = message.content_type
+        if raw_state is not None and _REGISTRATION_OWNED_CONTENT.get(content_type) == raw_state:
+            # Фото в upload_photo и контакт в enter_phone принимает регистрация
+            raise SkipHandler()
+        # Состояние уже прочитано FSMContextMiddleware - повторно в хранилище не ходим
+        return await self.handle_unexpected_content(message, state, raw_state, _CONTENT_META[content_type])
+    
+    async def handle_unexpected_text(
+        self, message: types.Message, state: FSMContext, raw_state: Optional[str] = None
+    ):
         """ИСПРАВЛЕННЫЙ обработчик неожиданных текстовых сообщений"""
         
         # ГЛАВНАЯ ЗАЩИТА: никогда не трогаем slash-команды (/start, /help и т.п.)
         # Их должны обрабатывать Command-фильтры в других роутерах.
         if message.text and message.text.startswith("/"):
-            import logging
-            logger = logging.getLogger(__name__)
             logger.debug(f"Fallback handler skipping slash command: {message.text}")
             # Просто возвращаемся - команда должна обрабатываться другими обработчиками
             return
         
         # КРИТИЧЕСКАЯ ЗАЩИТА: Проверяем известные команды/кнопки, которые должны обрабатываться другими обработчиками
         # Если это известная команда, НЕ обрабатываем её здесь
-        known_commands = [
-            "🔄 Подать заявку снова",
-            "🚀 Начать регистрацию",
-            "📋 Мой статус",
-            "✅ Мой статус",
-            "⏳ Мой статус",
-            "❌ Мой статус",
-            "🔄 Обновить статус",
-            "❓ Помощь",
-            "💬 Помощь",
-            "💬 Техподдержка",
-            "💬 Поддержка",
-            "📊 О розыгрыше",
-            "🏆 Результаты",
-            "🆘 МЕНЮ",
-            "❌ ОТМЕНА",
-            "Назад в меню",
-            "🏠 Главное меню",
-        ]
-        
-        # Проверяем, является ли это известной командой
-        if message.text in known_commands:
+        if message.text in _KNOWN_COMMANDS:
             # Это известная команда - не обрабатываем здесь, пусть другие обработчики её обработают
-            import logging
-            logger = logging.getLogger(__name__)
             logger.debug(f"Fallback handler skipping known command: {message.text}")
             return
         
         # Также проверяем частичное совпадение для длинных команд
-        for cmd in known_commands:
-            if len(cmd) > 5 and cmd in message.text:
-                import logging
-                logger = logging.getLogger(__name__)
+        for cmd in _KNOWN_COMMANDS_PARTIAL:
+            if cmd in message.text:
                 logger.debug(f"Fallback handler skipping known command (partial match): {message.text}")
                 return
         
-        current_state = await state.get_state()
+        current_state = raw_state
         
         # КРИТИЧЕСКАЯ ЗАЩИТА: Если пользователь в состоянии регистрации, 
         # этот обработчик НЕ должен срабатывать - он исключен фильтрами.
-        # Дополнительная проверка на случай, если фильтры не сработали
-        from bot.states import RegistrationStates
-        
-        # Проверяем состояние как строку
-        state_str = str(current_state) if current_state else None
-        
-        # Список ключей состояний регистрации (наиболее надежный способ проверки)
-        registration_state_keys = [
-            "RegistrationStates:enter_name",
-            "RegistrationStates:enter_phone", 
-            "RegistrationStates:enter_loyalty_card",
-            "RegistrationStates:upload_photo",
-            "RegistrationStates:repeat_submission_guard"
-        ]
-        
-        # Проверяем, является ли текущее состояние одним из состояний регистрации
-        is_registration_state = False
-        if current_state and state_str:
-            # Проверяем по строковому представлению состояния
-            state_str_normalized = state_str.replace(" ", "").lower()
-            for reg_key in registration_state_keys:
-                reg_key_normalized = reg_key.lower()
-                # Проверяем точное совпадение или вхождение ключа состояния
-                if (state_str == reg_key or 
-                    state_str_normalized == reg_key_normalized or
-                    reg_key_normalized in state_str_normalized or
-                    state_str.endswith(reg_key.split(':')[-1]) or
-                    f":{reg_key.split(':')[-1]}" in state_str):
-                    is_registration_state = True
-                    break
-            
-            # Дополнительная проверка по объекту состояния
-            if not is_registration_state:
-                registration_states = [
-                    RegistrationStates.enter_name,
-                    RegistrationStates.enter_phone,
-                    RegistrationStates.enter_loyalty_card,
-                    RegistrationStates.upload_photo,
-                    RegistrationStates.repeat_submission_guard
-                ]
-                if current_state in registration_states:
-                    is_registration_state = True
+        # Дополнительная проверка на случай, если фильтры не сработали:
+        # точное сравнение с заранее собранным набором состояний регистрации
+        is_registration_state = current_state in _REGISTRATION_TEXT_STATES
         
         if is_registration_state:
             # КРИТИЧЕСКАЯ ОШИБКА: Этот обработчик не должен срабатывать для состояний регистрации!
             # Просто возвращаемся без обработки - сообщение должно обрабатываться специальными обработчиками
-            import logging
-            logger = logging.getLogger(__name__)
             logger.error(
                 f"CRITICAL: Fallback handler intercepted message in registration state! "
                 f"State: {current_state}, User: {message.from_user.id}, Text: {message.text}. "
@@ -222,10 +431,10 @@ class FixedSmartFallbackHandler:
             # НЕ обрабатываем сообщение - просто возвращаемся
             return
         
-        context_manager = get_context_manager()
+        context_manager = self._ctx()
         
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id, 
                 UserContext.CONFUSED if current_state else UserContext.NAVIGATION,
                 UserAction.TEXT_INPUT
@@ -239,88 +448,29 @@ class FixedSmartFallbackHandler:
             is_confused = False
             if context_manager:
                 try:
-                    is_confused = await context_manager.detect_user_confusion(message.from_user.id, message, state)
+                    session = context_manager.peek_session(message.from_user.id)
+                    # Проверка читает FSM-хранилище: при его деградации не задерживаем ответ
+                    is_confused = await asyncio.wait_for(
+                        context_manager.detect_user_confusion(session, message, state),
+                        timeout=_CONFUSION_CHECK_TIMEOUT,
+                    )
+                except asyncio.TimeoutError:
+                    is_confused = False
                 except Exception:
+                    # Не скрываем ошибки молча, но пользователю отвечаем как обычно
+                    logger.exception("Confusion check failed for user %s", message.from_user.id)
                     is_confused = False
             
             if is_confused:
                 await self._handle_confused_user(message, state)
             else:
                 # Простое нейтральное сообщение для неизвестного текста
-                await message.answer(
-                    "🤔 **Не совсем понял ваш запрос.**\n\n"
-                    "💡 **Попробуйте:**\n"
-                    "📋 Проверить свой статус\n"
-                    "📊 Узнать о розыгрыше\n"
-                    "💬 Связаться с поддержкой\n\n"
-                    "👇 Используйте кнопки меню ниже:",
-                    parse_mode="Markdown"
-                )
-                keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-                await message.answer("Выберите действие:", reply_markup=keyboard)
+                await self._answer_with_main_menu(message, _MSG_UNKNOWN_TEXT)
     
     async def _provide_fsm_help(self, message: types.Message, state: FSMContext, current_state: str):
         """Контекстная помощь для пользователей в FSM состояниях"""
         
-        state_help_map = {
-            "RegistrationStates:enter_name": {
-                "message": "📝 **Сейчас нужно ввести имя**\n\n"
-                          "✅ **Примеры:**\n"
-                          "• Алексей\n"
-                          "• Анна-Мария\n"
-                          "• Жан-Поль\n"
-                          "• О'Коннор\n\n"
-                          "❌ **Избегайте:** фамилий, отчеств, цифр, пробелов\n\n"
-                          "💡 *Введите только ваше имя*",
-                "keyboard": get_name_input_keyboard(),
-                "wrong_content_hints": {
-                    "phone": "📱 Телефон вы укажете на следующем шаге!",
-                    "photo": "📸 Фото понадобится в конце регистрации!",
-                    "contact": "📞 Контакт пригодится для телефона!"
-                }
-            },
-            "RegistrationStates:enter_phone": {
-                "message": "📱 **Сейчас нужен номер телефона**\n\n"
-                          "✅ **Два способа:**\n"
-                          "• Нажать **📞 Отправить мой номер**\n"
-                          "• Написать в формате **+79001234567**\n\n"
-                          "💡 *Используйте действующий номер*",
-                "keyboard": get_phone_input_keyboard(),
-                "wrong_content_hints": {
-                    "name": "✅ Имя уже сохранено! Теперь телефон.",
-                    "photo": "📸 Фото будет последним шагом!"
-                }
-            },
-            "RegistrationStates:enter_loyalty_card": {
-                "message": "💳 **Сейчас нужен номер карты лояльности**\n\n"
-                          "✅ **Формат:** 13 или 16 цифр\n"
-                          "✅ **Где найти:** на лицевой стороне карты\n"
-                          "✅ **Примеры:** 1234567890123 или 1234567890123456\n\n"
-                          "💡 *Найдите карту в приложении или кошельке*",
-                "keyboard": get_loyalty_card_keyboard()
-            },
-            "RegistrationStates:upload_photo": {
-                "message": "📸 **Последний шаг - фото лифлета!**\n\n"
-                          "🎨 **Лифлет** = рекламная листовка/баннер\n\n"
-                          "✅ **Как отправить:**\n"
-                          "• Нажать **📷 Сделать фото**\n"
-                          "• Нажать **🖼️ Выбрать из галереи**\n"
-                          "• Просто прислать фото сообщением\n\n"
-                          "💡 *Фото должно быть четким и читаемым*",
-                "keyboard": get_photo_upload_keyboard()
-            },
-            "SupportStates:entering_message": {
-                "message": "💬 **Создание обращения в поддержку**\n\n"
-                          "✅ **Опишите проблему подробно:**\n"
-                          "• Что произошло?\n"
-                          "• На каком этапе?\n"
-                          "• Какие ошибки видите?\n\n"
-                          "📎 *Можете приложить фото или документ*",
-                "keyboard": None  # Используется клавиатура из support handler
-            }
-        }
-        
-        help_info = state_help_map.get(current_state)
+        help_info = _FSM_HELP.get(current_state)
         if not help_info:
             # Fallback для неизвестных состояний
             await message.answer(
@@ -342,16 +492,38 @@ class FixedSmartFallbackHandler:
             content_hint = help_info.get("wrong_content_hints", {}).get("contact", "")
         elif self._looks_like_phone(message.text):
             content_hint = help_info.get("wrong_content_hints", {}).get("phone", "")
-        elif self._looks_like_name(message.text) and "phone" in current_state:
+        elif self._looks_like_name(message.text) and current_state == RegistrationStates.enter_phone.state:
             content_hint = help_info.get("wrong_content_hints", {}).get("name", "")
         
         response = help_info["message"]
+        keyboard_factory = help_info["keyboard"]
         if content_hint:
             response = f"{content_hint}\n\n{response}"
         
         await message.answer(
             response,
-            reply_markup=help_info["keyboard"],
+            reply_markup=keyboard_factory() if keyboard_factory else None,
+            parse_mode="Markdown"
+        )
+    
+    async def _main_menu_keyboard(self, telegram_id: int):
+        """Главное меню по статусу из hot-кэша (ключ status:* сбрасывается при регистрации)"""
+        async def loader():
+            return await get_participant_status(telegram_id)
+        
+        status = await get_cache().get_or_set(
+            key=f"status:{telegram_id}",
+            loader=loader,
+            level="hot",
+        )
+        return adaptive_keyboards.main_menu_keyboard_for_status(status)
+    
+    async def _answer_with_main_menu(self, message: types.Message, text: str) -> None:
+        """Ответ в Markdown вместе с главным меню - одним сообщением"""
+        keyboard = await self._main_menu_keyboard(message.from_user.id)
+        await message.answer(
+            f"{text}\n\nВыберите действие:",
+            reply_markup=keyboard,
             parse_mode="Markdown"
         )
     
@@ -359,295 +531,105 @@ class FixedSmartFallbackHandler:
         """Проверяет, похож ли текст на номер телефона"""
         if not text:
             return False
-        clean_text = ''.join(c for c in text if c.isdigit() or c == '+')
-        return len(clean_text) >= 10 and (clean_text.startswith('+') or clean_text.startswith('7') or clean_text.startswith('8'))
+        clean_text = _PHONE_CLEAN.sub('', text)
+        return len(clean_text) >= 10 and clean_text.startswith(('+', '7', '8'))
     
     def _looks_like_name(self, text: str) -> bool:
         """Проверяет, похож ли текст на имя"""
         if not text:
             return False
         words = text.split()
-        return len(words) >= 2 and all(word.isalpha() or word.replace('-', '').isalpha() for word in words)
+        return len(words) >= 2 and all(_NAME_WORD.match(word) for word in words)
     
-    async def handle_unexpected_sticker(self, message: types.Message, state: FSMContext):
-        """Обработка стикеров с учетом FSM состояния"""
-        current_state = await state.get_state()
-        
-        context_manager = get_context_manager()
-        if context_manager:
-            await context_manager.increment_error_count(message.from_user.id)
-            witty_responses = context_manager.get_witty_responses()["sticker_in_registration"]
-            response = random.choice(witty_responses)
-        else:
-            response = "😊 Стикер принят! Но сейчас нужно что-то другое."
-        
-        await message.answer(response)
+    async def handle_unexpected_content(
+        self,
+        message: types.Message,
+        state: FSMContext,
+        current_state: Optional[str],
+        meta: dict,
+    ):
+        """Обработка стикеров, голосовых, медиа, фото, контактов и геолокации с учетом FSM состояния"""
+        if current_state or meta["ack_outside_fsm"]:
+            if meta["count_error"]:
+                context_manager = self._ctx()
+                if context_manager:
+                    context_manager.increment_error_count(message.from_user.id)
+            
+            witty = meta.get("witty")
+            await message.answer(next(self._witty[witty]) if witty else meta["ack"])
         
         # Предлагаем контекстную помощь с учетом FSM состояния
         if current_state:
             await self._provide_fsm_help(message, state, current_state)
         else:
             # Простое сообщение без проверки статуса
-            await message.answer(
-                "😊 **Спасибо за стикер!**\n\n"
-                "🤔 Но сейчас стикеры не требуются.\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
-    
-    async def handle_unexpected_voice(self, message: types.Message, state: FSMContext):
-        """Обработка голосовых сообщений с учетом FSM состояния"""
-        current_state = await state.get_state()
-        
-        context_manager = get_context_manager()
-        if context_manager:
-            await context_manager.increment_error_count(message.from_user.id)
-            witty_responses = context_manager.get_witty_responses()["voice_unexpected"]
-            response = random.choice(witty_responses)
-        else:
-            response = "🎤 Голосовое сообщение получено! Но сейчас нужен текст."
-        
-        await message.answer(response)
-        
-        if current_state:
-            await self._provide_fsm_help(message, state, current_state)
-        else:
-            # Простое сообщение без проверки статуса
-            await message.answer(
-                "🎤 **Спасибо за голосовое сообщение!**\n\n"
-                "🤔 Но сейчас голосовые сообщения не обрабатываются.\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
+            await self._answer_with_main_menu(message, meta["reply"])
     
-    async def handle_unexpected_media(self, message: types.Message, state: FSMContext):
-        """Обработка неожиданного медиа контента с учетом FSM состояния"""
-        current_state = await state.get_state()
-        
-        context_manager = get_context_manager()
-        if context_manager:
-            await context_manager.increment_error_count(message.from_user.id)
-        
-        content_type_map = {
-            'video': 'видео 🎥',
-            'audio': 'аудио 🎵', 
-            'animation': 'GIF 🎬',
-            'document': 'документ 📄'
-        }
-        
-        content_type = None
-        for msg_type, display_name in content_type_map.items():
-            if hasattr(message, msg_type) and getattr(message, msg_type):
-                content_type = display_name
-                break
-        
-        if not content_type:
-            content_type = "медиа 📎"
+    async def _handle_confused_user(self, message: types.Message, state: FSMContext):
+        """Помощь запутавшемуся пользователю"""
         
+        response = next(self._witty["confusion_general"])
         await message.answer(
-            f"📎 {content_type} получен! Но в данный момент мне нужно что-то другое.\n\n"
-            f"🎯 Давайте я подскажу, что сейчас лучше отправить:"
+            f"{response}\n\n🚀 **Быстрый перезапуск:**\n\n"
+            "🎯 **Куда направимся?**\n\n"
+            "Выберите, что вы хотели сделать:",
+            reply_markup=_QUICK_NAV_KB
         )
-        
-        if current_state:
-            await self._provide_fsm_help(message, state, current_state)
-        else:
-            # Простое сообщение без проверки статуса
-            await message.answer(
-                f"📎 **{content_type} получен!**\n\n"
-                f"🤔 Но сейчас такие файлы не требуются.\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
     
-    async def handle_unexpected_photo(self, message: types.Message, state: FSMContext):
-        """Обработка фото в неожиданных местах"""
-        current_state = await state.get_state()
-        
-        # Если пользователь в каком-то FSM состоянии (но не upload_photo)
-        if current_state:
-            context_manager = get_context_manager()
-            if context_manager:
-                await context_manager.increment_error_count(message.from_user.id)
-            
-            await message.answer(
-                "📸 Красивое фото! Но сейчас оно не подходит для текущего шага.\n\n"
-                "🔄 Давайте разберемся, что нужно сделать:"
-            )
-            
-            await self._provide_fsm_help(message, state, current_state)
-        else:
-            # Для фото вне FSM состояния - простое сообщение без проверки статуса
-            await message.answer(
-                "📸 **Спасибо за фото!**\n\n"
-                "🤔 Но сейчас фотографии не требуются.\n\n"
-                "💡 **Что вы можете сделать:**\n"
-                "📋 Проверить свой статус участия\n"
-                "📊 Узнать о розыгрыше\n"
-                "💬 Связаться с поддержкой\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
+    async def _dispatch_quick_nav(self, callback: types.CallbackQuery, state: FSMContext):
+        """Быстрая навигация: один фильтр по префиксу, действие по суффиксу callback_data"""
+        action = self._quick_nav.get(callback.data[len(_QUICK_NAV_PREFIX):])
+        if action is None:
+            await self.handle_unknown_callback(callback)
+            return
+        # Снимаем "часики" с кнопки одновременно с действием, а не после него.
+        # Ошибка ответа на callback (например, устаревший запрос) не мешает действию
+        _, action_result = await asyncio.gather(
+            callback.answer(), action(callback, state), return_exceptions=True
+        )
+        if isinstance(action_result, BaseException):
+            raise action_result
     
-    async def handle_unexpected_contact(self, message: types.Message, state: FSMContext):
-        """Обработка контакта в неожиданных местах"""
-        current_state = await state.get_state()
-        
-        # Если пользователь в каком-то FSM состоянии (но не enter_phone - фильтр исключает)
-        
-        if current_state:
-            context_manager = get_context_manager()
-            if context_manager:
-                await context_manager.increment_error_count(message.from_user.id)
-            
-            await message.answer(
-                "📱 Спасибо за контакт! Но сейчас он пригодится на другом этапе.\n\n"
-                "🧭 Позвольте направить вас:"
-            )
-            
-            await self._provide_fsm_help(message, state, current_state)
-        else:
-            # Простое сообщение без проверки статуса
-            await message.answer(
-                "📱 **Спасибо за контакт!**\n\n"
-                "🤔 Но сейчас контакты не требуются.\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
+    async def _quick_nav_main(self, callback: types.CallbackQuery, state: FSMContext):
+        await state.clear()
+        keyboard = await self._main_menu_keyboard(callback.from_user.id)
+        await callback.message.edit_text(
+            "🏠 **Главное меню**\n\nВыберите нужный раздел:",
+            reply_markup=keyboard
+        )
     
-    async def handle_unexpected_location(self, message: types.Message, state: FSMContext):
-        """Обработка геолокации"""
-        current_state = await state.get_state()
-        
-        if current_state:
-            await message.answer(
-                "🗺️ Интересное место! Но для нашего розыгрыша геолокация не нужна.\n\n"
-                "🎯 Давайте вернемся к главному:"
-            )
-            await self._provide_fsm_help(message, state, current_state)
-        else:
-            # Простое сообщение без проверки статуса
-            await message.answer(
-                "🗺️ **Спасибо за геолокацию!**\n\n"
-                "🤔 Но сейчас геолокация не требуется.\n\n"
-                "👇 Используйте кнопки меню ниже:",
-                parse_mode="Markdown"
-            )
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
-            await message.answer("Выберите действие:", reply_markup=keyboard)
+    async def _quick_nav_register(self, callback: types.CallbackQuery, state: FSMContext):
+        await state.set_state(RegistrationStates.enter_name)
+        await callback.message.edit_text(
+            "🚀 **Регистрация участника**\n\nВведите ваше полное имя (как в документе).\nНапример: Иванов Иван Иванович"
+        )
+        await callback.message.answer(
+            "👆 Напишите имя в следующем сообщении:",
+            reply_markup=get_name_input_keyboard()
+        )
     
-    async def _handle_confused_user(self, message: types.Message, state: FSMContext):
-        """Помощь запутавшемуся пользователю"""
-        
-        context_manager = get_context_manager()
-        if context_manager:
-            confusion_responses = context_manager.get_witty_responses()["confusion_general"]
-            response = random.choice(confusion_responses)
-        else:
-            response = "🤔 Кажется, что-то пошло не так. Давайте начнем сначала!"
-        
-        await message.answer(f"{response}\n\n🚀 **Быстрый перезапуск:**")
-        
-        # Создаем кнопки для быстрой навигации
-        quick_nav = InlineKeyboardMarkup(inline_keyboard=[
-            [
-                InlineKeyboardButton(text="🏠 Главное меню", callback_data="quick_nav_main"),
-                InlineKeyboardButton(text="🚀 К регистрации", callback_data="quick_nav_register")
-            ],
-            [
-                InlineKeyboardButton(text="💬 В поддержку", callback_data="quick_nav_support"),
-                InlineKeyboardButton(text="❓ Помощь", callback_data="quick_nav_help")
-            ]
-        ])
-        
-        await message.answer(
-            "🎯 **Куда направимся?**\n\n"
-            "Выберите, что вы хотели сделать:",
-            reply_markup=quick_nav
+    async def _quick_nav_support(self, callback: types.CallbackQuery, state: FSMContext):
+        await state.clear()
+        await callback.message.edit_text(
+            "💬 **Центр поддержки**\n\nВыберите, что вас интересует:"
+        )
+        await callback.message.answer(
+            "Чем можем помочь?",
+            reply_markup=get_support_menu_keyboard()
         )
     
-    def _register_quick_nav_handlers(self) -> None:
-        """Регистрация обработчиков для быстрых inline-действий навигации."""
-
-        @self.router.callback_query(F.data == "quick_nav_main")
-        async def quick_nav_main(callback: types.CallbackQuery, state: FSMContext):
-            await state.clear()
-            keyboard = await get_main_menu_keyboard_for_user(callback.from_user.id)
-            await callback.message.edit_text(
-                "🏠 **Главное меню**\n\nВыберите нужный раздел:",
-                reply_markup=keyboard
-            )
-            await callback.answer()
-
-        @self.router.callback_query(F.data == "quick_nav_register")
-        async def quick_nav_register(callback: types.CallbackQuery, state: FSMContext):
-            from bot.states import RegistrationStates
-            await state.set_state(RegistrationStates.enter_name)
-            await callback.message.edit_text(
-                "🚀 **Регистрация участника**\n\nВведите ваше полное имя (как в документе).\nНапример: Иванов Иван Иванович"
-            )
-            await callback.message.answer(
-                "👆 Напишите имя в следующем сообщении:",
-                reply_markup=get_name_input_keyboard()
-            )
-            await callback.answer()
-
-        @self.router.callback_query(F.data == "quick_nav_support")
-        async def quick_nav_support(callback: types.CallbackQuery, state: FSMContext):
-            await state.clear()
-            await callback.message.edit_text(
-                "💬 **Центр поддержки**\n\nВыберите, что вас интересует:"
-            )
-            await callback.message.answer(
-                "Чем можем помочь?",
-                reply_markup=get_support_menu_keyboard()
-            )
-            await callback.answer()
-
-        @self.router.callback_query(F.data == "quick_nav_cancel")
-        async def quick_nav_cancel(callback: types.CallbackQuery, state: FSMContext):
-            # Эквивалент /cancel: очищаем состояние и возвращаемся в меню
-            await state.clear()
-            keyboard = await get_main_menu_keyboard_for_user(callback.from_user.id)
-            await callback.message.edit_text(
-                "❌ **Действие отменено**\n\n🏠 Возвращаемся в главное меню",
-                reply_markup=keyboard,
-                parse_mode="Markdown"
-            )
-            await callback.answer()
-
-        @self.router.callback_query(F.data == "quick_nav_help")  # noqa: F841
-        async def quick_nav_help(callback: types.CallbackQuery):
-            """Handle quick help navigation"""
-            help_text = (
-                "❓ **БЫСТРАЯ СПРАВКА**\n\n"
-                "🚀 **Регистрация** - подать заявку на участие в розыгрыше\n"
-                "📋 **Мой статус** - проверить статус вашей заявки\n" 
-                "💬 **Поддержка** - задать вопрос или сообщить о проблеме\n"
-                "📊 **О розыгрыше** - правила, призы и сроки\n\n"
-                "🎯 **Для участия нужно:**\n"
-                "1️⃣ Полное имя (как в документе)\n"
-                "2️⃣ Номер телефона\n"
-                "3️⃣ Номер карты лояльности\n"
-                "4️⃣ Фото лифлета\n\n"
-                "⚡ **Экстренные команды:**\n"
-                "• `/start` - перезапуск бота\n"
-                "• `/cancel` - отменить текущее действие\n"
-                "• `/help` - получить помощь"
-            )
-            
-            await callback.message.edit_text(help_text, parse_mode="Markdown")
-            await callback.answer()
+    async def _quick_nav_cancel(self, callback: types.CallbackQuery, state: FSMContext):
+        # Эквивалент /cancel: очищаем состояние и возвращаемся в меню
+        await state.clear()
+        keyboard = await self._main_menu_keyboard(callback.from_user.id)
+        await callback.message.edit_text(
+            "❌ **Действие отменено**\n\n🏠 Возвращаемся в главное меню",
+            reply_markup=keyboard,
+            parse_mode="Markdown"
+        )
+    
+    async def _quick_nav_help(self, callback: types.CallbackQuery, state: FSMContext):
+        await callback.message.edit_text(_QUICK_HELP_TEXT, parse_mode="Markdown")
     
     async def handle_unknown_callback(self, callback: types.CallbackQuery):
         """Обработка неизвестных callback запросов"""
@@ -658,8 +640,19 @@ class FixedSmartFallbackHandler:
         )
 
 
+_fallback_handler: Optional[FixedSmartFallbackHandler] = None
+
+
+def get_fallback_handler() -> FixedSmartFallbackHandler:
+    """Единственный экземпляр FixedSmartFallbackHandler"""
+    global _fallback_handler
+    if _fallback_handler is None:
+        _fallback_handler = FixedSmartFallbackHandler()
+    return _fallback_handler
+
+
 def setup_fixed_fallback_handlers(dispatcher) -> FixedSmartFallbackHandler:
     """Настройка ИСПРАВЛЕННЫХ fallback обработчиков"""
-    handler = FixedSmartFallbackHandler()
+    handler = get_fallback_handler()
     handler.setup(dispatcher)
     return handler
@@ -1,11 +1,14 @@
 """Глобальные команды, которые работают в любом состоянии FSM."""
 
+import asyncio
+
 from aiogram import F, Router, types
 from aiogram.filters import Command, StateFilter
 from aiogram.fsm.context import FSMContext
 
 from bot.keyboards import get_main_menu_keyboard_for_user
 from bot.context_manager import get_context_manager, UserContext, UserAction
+from bot.smart_keyboards import adaptive_keyboards
 
 
 class GlobalCommandsHandler:
@@ -45,26 +48,25 @@ class GlobalCommandsHandler:
         # Кнопка "Назад в меню" из любого состояния, НО НЕ в состояниях регистрации
         # В состояниях регистрации эти кнопки должны обрабатываться специальными обработчиками
         # Используем точное совпадение, чтобы не перехватывать кнопку "⬅️ Назад в меню" в состояниях регистрации
-        from bot.states import RegistrationStates
+        # Один фильтр на весь набор состояний: состояние читается один раз
+        outside_registration = ~StateFilter(
+            RegistrationStates.enter_name,
+            RegistrationStates.enter_phone,
+            RegistrationStates.enter_loyalty_card,
+            RegistrationStates.upload_photo,
+            RegistrationStates.repeat_submission_guard,
+        )
         self.router.message.register(
             self.back_to_menu, 
             F.text == "⬅️ Назад в меню",
-            ~StateFilter(RegistrationStates.enter_name),
-            ~StateFilter(RegistrationStates.enter_phone),
-            ~StateFilter(RegistrationStates.enter_loyalty_card),
-            ~StateFilter(RegistrationStates.upload_photo),
-            ~StateFilter(RegistrationStates.repeat_submission_guard),
+            outside_registration,
         )
         
         # Кнопка "Главное меню" из любого состояния (включая поддержку), НО НЕ в состояниях регистрации
         self.router.message.register(
             self.back_to_menu, 
             F.text == "🏠 Главное меню",
-            ~StateFilter(RegistrationStates.enter_name),
-            ~StateFilter(RegistrationStates.enter_phone),
-            ~StateFilter(RegistrationStates.enter_loyalty_card),
-            ~StateFilter(RegistrationStates.upload_photo),
-            ~StateFilter(RegistrationStates.repeat_submission_guard),
+            outside_registration,
         )
     
     async def handle_start(self, message: types.Message, state: FSMContext) -> None:
@@ -81,19 +83,19 @@ class GlobalCommandsHandler:
         
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
             )
         
-        # Проверяем статус регистрации пользователя
-        registration_status = await get_participant_status(message.from_user.id)
+        # Статус регистрации и принятие соглашения - независимые запросы, выполняем параллельно
+        registration_status, agreement_accepted = await asyncio.gather(
+            get_participant_status(message.from_user.id),
+            check_user_agreement(message.from_user.id),
+        )
         is_registered = registration_status is not None
         
-        # Проверяем, принял ли пользователь соглашение ранее
-        agreement_accepted = await check_user_agreement(message.from_user.id)
-        
         # DEBUG: Логируем для отладки
         import logging
         logger = logging.getLogger(__name__)
@@ -103,7 +105,8 @@ class GlobalCommandsHandler:
         if is_registered or agreement_accepted:
             # Показываем соответствующее приветствие
             welcome_msg = smart_messages.get_welcome_message(is_registered=is_registered)
-            keyboard = await get_main_menu_keyboard_for_user(message.from_user.id)
+            # Статус уже получен - не запрашиваем его повторно ради клавиатуры
+            keyboard = adaptive_keyboards.main_menu_keyboard_for_status(registration_status)
             await message.answer(
                 f"🔄 **Перезапуск бота**\n\n{welcome_msg['text']}", 
                 reply_markup=keyboard, 
@@ -251,7 +254,7 @@ class GlobalCommandsHandler:
         
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
@@ -284,7 +287,7 @@ class GlobalCommandsHandler:
         
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
@@ -7,7 +7,7 @@ import uuid
 import logging
 from contextlib import suppress
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from aiogram import F, Router, types
 from aiogram.fsm.context import FSMContext
@@ -211,7 +211,7 @@ class RegistrationHandler:
         from bot.context_manager import get_context_manager
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.REGISTRATION,
                 UserAction.BUTTON_CLICK
@@ -274,7 +274,7 @@ class RegistrationHandler:
         from bot.context_manager import get_context_manager
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.REGISTRATION,
                 UserAction.TEXT_INPUT
@@ -283,7 +283,7 @@ class RegistrationHandler:
         # If user sends a phone number as name, guide them
         if validate_phone(full_name):
             if context_manager:
-                await context_manager.increment_error_count(message.from_user.id)
+                context_manager.increment_error_count(message.from_user.id)
             await message.answer(
                 "📱 **Это похоже на номер телефона!**\n\n"
                 "🎯 Сейчас нам нужно ваше **имя**\n"
@@ -300,7 +300,7 @@ class RegistrationHandler:
             
         if not validate_full_name(full_name):
             if context_manager:
-                await context_manager.increment_error_count(message.from_user.id)
+                context_manager.increment_error_count(message.from_user.id)
             error_messages = smart_messages.get_error_messages()
             error_msg = error_messages["name_invalid"]
             
@@ -496,7 +496,7 @@ class RegistrationHandler:
         from bot.context_manager import get_context_manager, UserContext, UserAction
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
@@ -543,7 +543,7 @@ class RegistrationHandler:
             # Проверяем, что контакт содержит номер телефона
             if not message.contact or not message.contact.phone_number:
                 if context_manager:
-                    await context_manager.increment_error_count(message.from_user.id)
+                    context_manager.increment_error_count(message.from_user.id)
                 await message.answer(
                     "Не удалось получить номер телефона из контакта.\n"
                     "Попробуйте еще раз или введите номер вручную.",
@@ -577,7 +577,7 @@ class RegistrationHandler:
                 
             # Обновляем контекст
             if context_manager:
-                await context_manager.update_context(
+                context_manager.update_context(
                     message.from_user.id,
                     UserContext.REGISTRATION,
                     UserAction.CONTACT_SHARE
@@ -620,7 +620,7 @@ class RegistrationHandler:
             
         except Exception as e:
             if context_manager:
-                await context_manager.increment_error_count(message.from_user.id)
+                context_manager.increment_error_count(message.from_user.id)
             await message.answer(
                 "Произошла ошибка при обработке контакта.\n"
                 "Попробуйте ввести номер телефона вручную в формате +79001234567",
@@ -1141,7 +1141,7 @@ class RegistrationHandler:
         
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.BUTTON_CLICK
@@ -1181,7 +1181,7 @@ class RegistrationHandler:
         from bot.context_manager import get_context_manager, UserContext, UserAction
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.NAVIGATION,
                 UserAction.TEXT_INPUT
@@ -1227,8 +1227,20 @@ class RegistrationHandler:
         await message.answer("Главное меню:", reply_markup=keyboard)
 
 
+_registration_handler: Optional[RegistrationHandler] = None
+
+
+def get_registration_handler() -> RegistrationHandler:
+    """Зарегистрированный в диспетчере экземпляр RegistrationHandler"""
+    if _registration_handler is None:
+        raise RuntimeError("Registration handlers are not initialized")
+    return _registration_handler
+
+
 def setup_registration_handlers(dispatcher, *, upload_dir: Path, cache, bot) -> RegistrationHandler:
+    global _registration_handler
     handler = RegistrationHandler(upload_dir=upload_dir, cache=cache, bot=bot)
     handler.setup(dispatcher)
+    _registration_handler = handler
     return handler
 
@@ -76,7 +76,7 @@ class SupportHandler:
         from bot.context_manager import get_context_manager, UserContext, UserAction
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.SUPPORT,
                 UserAction.BUTTON_CLICK
@@ -99,7 +99,7 @@ class SupportHandler:
     async def ask_new_ticket(self, message: types.Message, state: FSMContext) -> None:
         context_manager = get_context_manager()
         if context_manager:
-            await context_manager.update_context(
+            context_manager.update_context(
                 message.from_user.id,
                 UserContext.SUPPORT,
                 UserAction.BUTTON_CLICK
@@ -712,19 +712,16 @@ class SupportHandler:
             await message.answer("🏠 Главное меню", reply_markup=keyboard)
         elif "статус" in message.text.lower():
             # Перенаправляем на обработчик статуса
-            from bot.handlers.common import CommonHandlers
-            common = CommonHandlers()
-            await common.status_handler(message)
+            from bot.handlers.common import get_common_handlers
+            await get_common_handlers().status_handler(message)
         elif "помощь" in message.text.lower():
             # Перенаправляем на обработчик помощи
-            from bot.handlers.common import CommonHandlers
-            common = CommonHandlers()
-            await common.help_and_support_handler(message)
+            from bot.handlers.common import get_common_handlers
+            await get_common_handlers().help_and_support_handler(message)
         elif "розыгрыш" in message.text.lower():
             # Перенаправляем на обработчик информации
-            from bot.handlers.common import CommonHandlers
-            common = CommonHandlers()
-            await common.show_info_menu(message)
+            from bot.handlers.common import get_common_handlers
+            await get_common_handlers().show_info_menu(message)
 
     async def reply_to_ticket(self, callback: types.CallbackQuery, state: FSMContext) -> None:
         """Handle reply to ticket button"""
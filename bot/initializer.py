@@ -33,7 +33,7 @@ class BotInitializer:
         from bot.handlers.global_commands import setup_global_commands
         from bot.handlers.fallback_fixed import setup_fixed_fallback_handlers
         from bot.middleware.fsm_logger import setup_fsm_middleware
-        from bot.middleware import setup_rate_limit_middleware
+        from bot.middleware import setup_rate_limit_middleware, setup_send_throttle_middleware
         from services import init_notification_service, init_photo_upload_service, init_fraud_detection_service
         
         # Initialize context manager
@@ -58,28 +58,21 @@ class BotInitializer:
         logger.info("✅ Services initialized")
         
         # Register handlers in priority order
-        # В aiogram последний зарегистрированный роутер имеет ПРИОРИТЕТ.
-        # Поэтому:
-        # 1) fallback-ротер регистрируем ПЕРВЫМ (самый низкий приоритет),
-        # 2) затем common/support,
-        # 3) затем registration,
-        # 4) и в самом конце global commands (наивысший приоритет).
+        # aiogram проверяет роутеры в порядке подключения, и апдейт забирает
+        # первый подошедший обработчик. Поэтому fallback-роутер подключаем
+        # ПОСЛЕДНИМ: до него доходят только сообщения и callback, которые
+        # не обработал ни один другой роутер.
 
-        # 1. Fallback handlers (lowest priority – регистрируем ПЕРВЫМИ)
-        setup_fixed_fallback_handlers(bot.dispatcher)
-        logger.info("✅ Fallback handlers registered")
-
-        # 2. Common/support handlers (средний приоритет)
+        # 1. Common/support handlers
         setup_common_handlers(bot.dispatcher)
         setup_support_handlers(bot.dispatcher)
 
-        # 3. Global commands (регистрируем ДО registration handlers, чтобы команды работали везде)
+        # 2. Global commands (регистрируем ДО registration handlers, чтобы команды работали везде)
         # НО обработчики регистрации имеют приоритет в своих состояниях благодаря StateFilter
         setup_global_commands(bot.dispatcher)
         logger.info("✅ Global commands registered")
 
-        # 4. Registration handlers (ВЫСШИЙ приоритет - регистрируем ПОСЛЕДНИМИ)
-        # Это гарантирует, что обработчики регистрации имеют приоритет в своих состояниях
+        # 3. Registration handlers (в своих состояниях опираются на StateFilter)
         # Use already created upload_path
         setup_registration_handlers(
             bot.dispatcher,
@@ -89,6 +82,10 @@ class BotInitializer:
         )
         logger.info("✅ Registration handlers registered")
 
+        # 4. Fallback handlers (самый низкий приоритет - подключаем ПОСЛЕДНИМИ)
+        setup_fixed_fallback_handlers(bot.dispatcher)
+        logger.info("✅ Fallback handlers registered")
+
         # 5. Middleware
         setup_fsm_middleware(bot.dispatcher)
         setup_rate_limit_middleware(
@@ -97,6 +94,8 @@ class BotInitializer:
             max_callbacks=3,
             window_seconds=2.0
         )
+        # Исходящие запросы: 30 сообщений/с на бота, в чат - до 3 сразу, затем 1/с
+        setup_send_throttle_middleware(bot.bot, global_rate=30, per_chat_interval=1.0, per_chat_burst=3)
         logger.info("✅ Middleware configured")
         
         return bot
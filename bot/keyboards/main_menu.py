@@ -1,9 +1,17 @@
-"""Keyboard layouts for the Telegram bot"""
+"""Keyboard layouts for the Telegram bot
+
+Static keyboards are built once and cached with lru_cache: the returned
+markup objects are shared between all users and must never be mutated.
+"""
+
+from functools import lru_cache
 
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
+from bot.callbacks import InfoCallback, InfoSection
 from database.repositories import get_participant_status
 
 # Main menu keyboard
+@lru_cache(maxsize=8)
 def get_main_menu_keyboard(user_status: str = None) -> ReplyKeyboardMarkup:
     """Get main menu keyboard based on user registration status"""
     keyboard = []
@@ -27,26 +35,31 @@ async def get_main_menu_keyboard_for_user(telegram_id: int) -> ReplyKeyboardMark
     return await adaptive_keyboards.get_main_menu_keyboard(telegram_id)
 
 # Registration process keyboards
+@lru_cache(maxsize=1)
 def get_name_input_keyboard() -> ReplyKeyboardMarkup:
     """Keyboard for name input step with smart progress"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_registration_step_keyboard(1, "name")
 
+@lru_cache(maxsize=1)
 def get_phone_input_keyboard() -> ReplyKeyboardMarkup:
     """Keyboard for phone input step with smart progress"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_registration_step_keyboard(2, "phone")
 
+@lru_cache(maxsize=1)
 def get_loyalty_card_keyboard() -> ReplyKeyboardMarkup:
     """Keyboard for loyalty card input with smart progress"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_registration_step_keyboard(3, "loyalty_card")
 
+@lru_cache(maxsize=1)
 def get_photo_upload_keyboard() -> ReplyKeyboardMarkup:
     """Keyboard for photo upload step with smart progress"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_registration_step_keyboard(4, "photo")
 
+@lru_cache(maxsize=1)
 def get_confirmation_keyboard() -> InlineKeyboardMarkup:
     """Keyboard for data confirmation"""
     keyboard = [
@@ -68,6 +81,7 @@ def get_confirmation_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 # Status check keyboards
+@lru_cache(maxsize=1)
 def get_status_keyboard() -> ReplyKeyboardMarkup:
     """Keyboard for status checking"""
     keyboard = [
@@ -78,11 +92,13 @@ def get_status_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 # Support system keyboards
+@lru_cache(maxsize=1)
 def get_support_menu_keyboard() -> ReplyKeyboardMarkup:
     """Main support menu keyboard with quick actions"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_support_keyboard_with_quick_actions()
 
+@lru_cache(maxsize=1)
 def get_faq_keyboard() -> InlineKeyboardMarkup:
     """FAQ categories keyboard"""
     keyboard = [
@@ -101,26 +117,29 @@ def get_support_categories_keyboard() -> InlineKeyboardMarkup:
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_smart_categories_keyboard()
 
+@lru_cache(maxsize=1)
 def get_ticket_actions_keyboard() -> ReplyKeyboardMarkup:
     """Actions for ticket creation with smart hints"""
     from bot.smart_keyboards import adaptive_keyboards
     return adaptive_keyboards.get_ticket_creation_keyboard()
 
 # Information keyboards
+@lru_cache(maxsize=1)
 def get_info_menu_keyboard() -> InlineKeyboardMarkup:
     """Information menu keyboard"""
     keyboard = [
-        [InlineKeyboardButton(text="🗒 Правила участия в розыгрыше", callback_data="info_rules")],
-        [InlineKeyboardButton(text="✅ Как получить стикеры", callback_data="info_stickers")],
-        [InlineKeyboardButton(text="✏️ Как участвовать в розыгрыше", callback_data="info_participate")],
-        [InlineKeyboardButton(text="🏆 Призы розыгрыша", callback_data="info_prizes")],
-        [InlineKeyboardButton(text="📅 Сроки проведения", callback_data="info_schedule")],
-        [InlineKeyboardButton(text="😊 Оплата улыбкой через Сбер ID", callback_data="info_sberpay_id")],
-        [InlineKeyboardButton(text="📱 Оплата улыбкой через приложение", callback_data="info_sberpay_app")]
+        [InlineKeyboardButton(text="🗒 Правила участия в розыгрыше", callback_data=InfoCallback(section=InfoSection.RULES).pack())],
+        [InlineKeyboardButton(text="✅ Как получить стикеры", callback_data=InfoCallback(section=InfoSection.STICKERS).pack())],
+        [InlineKeyboardButton(text="✏️ Как участвовать в розыгрыше", callback_data=InfoCallback(section=InfoSection.PARTICIPATE).pack())],
+        [InlineKeyboardButton(text="🏆 Призы розыгрыша", callback_data=InfoCallback(section=InfoSection.PRIZES).pack())],
+        [InlineKeyboardButton(text="📅 Сроки проведения", callback_data=InfoCallback(section=InfoSection.SCHEDULE).pack())],
+        [InlineKeyboardButton(text="😊 Оплата улыбкой через Сбер ID", callback_data=InfoCallback(section=InfoSection.SBERPAY_ID).pack())],
+        [InlineKeyboardButton(text="📱 Оплата улыбкой через приложение", callback_data=InfoCallback(section=InfoSection.SBERPAY_APP).pack())]
     ]
     return InlineKeyboardMarkup(inline_keyboard=keyboard)
 
 # Admin keyboards (for quick actions)
+@lru_cache(maxsize=1)
 def get_admin_quick_keyboard() -> ReplyKeyboardMarkup:
     """Quick admin actions keyboard"""
     keyboard = [
@@ -131,6 +150,7 @@ def get_admin_quick_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=keyboard, resize_keyboard=True)
 
 # Universal action keyboards
+@lru_cache(maxsize=1)
 def get_back_to_menu_keyboard() -> ReplyKeyboardMarkup:
     """Simple back to menu keyboard"""
     keyboard = [
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Dict, List, Optional
 from enum import Enum
 import random
@@ -202,8 +203,9 @@ class SmartMessages:
         }
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_support_messages() -> Dict[str, Dict[str, str]]:
-        """Сообщения для системы поддержки"""
+        """Сообщения для системы поддержки (общий словарь - не изменять)"""
         return {
             "menu": {
                 "text": (
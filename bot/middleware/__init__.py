@@ -2,6 +2,7 @@
 
 from .fsm_logger import setup_fsm_middleware, FSMLoggingMiddleware, FSMCleanupMiddleware
 from .rate_limit import setup_rate_limit_middleware, RateLimitMiddleware
+from .send_throttle import setup_send_throttle_middleware, SendThrottleMiddleware
 
 __all__ = [
     "setup_fsm_middleware", 
@@ -9,4 +10,6 @@ __all__ = [
     "FSMCleanupMiddleware",
     "setup_rate_limit_middleware",
     "RateLimitMiddleware",
+    "setup_send_throttle_middleware",
+    "SendThrottleMiddleware",
 ]
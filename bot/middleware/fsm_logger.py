@@ -1,6 +1,7 @@
 """Middleware для логирования переходов состояний FSM."""
 
 import logging
+import time
 from typing import Any, Awaitable, Callable, Dict
 
 from aiogram import BaseMiddleware
@@ -63,9 +64,7 @@ class FSMLoggingMiddleware(BaseMiddleware):
                 context_manager = get_context_manager()
                 if context_manager and user_id in context_manager.sessions:
                     session = context_manager.sessions[user_id]
-                    session.breadcrumbs.append(f"{current_state}→{new_state}")
-                    if len(session.breadcrumbs) > 20:  # Ограничиваем историю
-                        session.breadcrumbs = session.breadcrumbs[-20:]
+                    session.breadcrumbs.append(f"{current_state}→{new_state}")  # deque сам ограничивает историю
             
             return result
             
@@ -78,7 +77,7 @@ class FSMLoggingMiddleware(BaseMiddleware):
             # Увеличиваем счетчик ошибок
             context_manager = get_context_manager()
             if context_manager:
-                await context_manager.increment_error_count(user_id)
+                context_manager.increment_error_count(user_id)
             
             raise
 
@@ -106,9 +105,7 @@ class FSMCleanupMiddleware(BaseMiddleware):
     
     async def _cleanup_old_sessions(self, context_manager):
         """Очистка старых неактивных сессий"""
-        from datetime import datetime, timedelta
-        
-        cutoff_time = datetime.now() - timedelta(hours=self.session_timeout_hours)
+        cutoff_time = time.monotonic() - self.session_timeout_hours * 3600
         expired_sessions = []
         
         for user_id, session in context_manager.sessions.items():
@@ -0,0 +1,145 @@
+"""Outbound throttling for Telegram API requests that target a chat."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response, TelegramType
+from asyncio_throttle import Throttler
+
+logger = logging.getLogger(__name__)
+
+
+class _ChatSlot:
+    """FIFO lock and token bucket for a single chat."""
+
+    __slots__ = ("lock", "tokens", "updated", "users")
+
+    def __init__(self, tokens: float) -> None:
+        self.lock = asyncio.Lock()
+        self.tokens = tokens
+        self.updated = time.monotonic()
+        # Requests currently queued or in flight; a slot in use is never pruned
+        self.users = 0
+
+
+class SendThrottleMiddleware(BaseRequestMiddleware):
+    """Keep outgoing sends within Telegram limits.
+
+    Every request with a ``chat_id`` (send/edit/copy...) passes a bot-wide
+    throttler and a per-chat token bucket: requests to one chat are sent in
+    FIFO order, up to ``per_chat_burst`` at once and then one per
+    ``per_chat_interval`` seconds. ``TelegramRetryAfter`` releases the chat,
+    waits the pause requested by Telegram and queues the request again.
+    """
+
+    def __init__(
+        self,
+        global_rate: int = 30,
+        per_chat_interval: float = 1.0,
+        per_chat_burst: int = 3,
+        max_retries: int = 3,
+        max_chats: int = 10000,
+    ) -> None:
+        self.per_chat_interval = per_chat_interval
+        self.per_chat_burst = per_chat_burst
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self._global = Throttler(rate_limit=global_rate, period=1.0)
+        self._chats: Dict[int | str, _ChatSlot] = {}
+        self._prune_at = max_chats
+
+    def _slot(self, chat_id: int | str) -> _ChatSlot:
+        slot = self._chats.get(chat_id)
+        if slot is None:
+            if len(self._chats) >= self._prune_at:
+                self._prune()
+            slot = self._chats[chat_id] = _ChatSlot(self.per_chat_burst)
+        return slot
+
+    def _refilled(self, slot: _ChatSlot, now: float) -> float:
+        if self.per_chat_interval <= 0:
+            return float(self.per_chat_burst)
+        return min(self.per_chat_burst, slot.tokens + (now - slot.updated) / self.per_chat_interval)
+
+    def _prune(self) -> None:
+        """Drop idle chats whose bucket is full again: they behave like new ones."""
+        now = time.monotonic()
+        idle = [
+            chat_id for chat_id, slot in self._chats.items()
+            if slot.users == 0 and self._refilled(slot, now) >= self.per_chat_burst
+        ]
+        for chat_id in idle:
+            del self._chats[chat_id]
+        # Chats still in use stay; do not rescan on every new chat until the map doubles
+        self._prune_at = max(self.max_chats, 2 * len(self._chats))
+
+    def _reserve(self, slot: _ChatSlot) -> float:
+        """Take a token from the chat bucket and return how long to wait for it."""
+        now = time.monotonic()
+        slot.tokens = self._refilled(slot, now) - 1
+        slot.updated = now
+        if slot.tokens >= 0:
+            return 0.0
+        return -slot.tokens * self.per_chat_interval
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> Response[TelegramType]:
+        chat_id: Optional[int | str] = getattr(method, "chat_id", None)
+        if chat_id is None:
+            # getUpdates, answerCallbackQuery и т.п. не расходуют лимит чата
+            return await make_request(bot, method)
+
+        slot = self._slot(chat_id)
+        slot.users += 1
+        try:
+            attempt = 0
+            while True:
+                async with slot.lock:
+                    delay = self._reserve(slot)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    try:
+                        async with self._global:
+                            return await make_request(bot, method)
+                    except TelegramRetryAfter as e:
+                        attempt += 1
+                        if attempt > self.max_retries:
+                            raise
+                        retry_after = e.retry_after
+                # Ждем вне блокировки, чтобы не задерживать другие запросы в этот чат
+                logger.warning(
+                    "Flood control on %s, retrying in %s s (attempt %s/%s)",
+                    type(method).__name__, retry_after, attempt, self.max_retries,
+                )
+                await asyncio.sleep(retry_after)
+        finally:
+            slot.users -= 1
+
+
+def setup_send_throttle_middleware(
+    bot: Bot,
+    *,
+    global_rate: int = 30,
+    per_chat_interval: float = 1.0,
+    per_chat_burst: int = 3,
+) -> SendThrottleMiddleware:
+    """Attach outbound throttling to the bot session."""
+    throttle = SendThrottleMiddleware(
+        global_rate=global_rate,
+        per_chat_interval=per_chat_interval,
+        per_chat_burst=per_chat_burst,
+    )
+    bot.session.middleware(throttle)
+    return throttle
@@ -5,7 +5,9 @@ from __future__ import annotations
 import asyncio
 from typing import Awaitable, Callable, Iterable
 
+import ujson
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
 from aiogram.enums import ParseMode
 try:
     # aiogram >=3.7.0
@@ -25,8 +27,10 @@ class OptimizedBot:
         worker_threads: int,
         message_queue_size: int,
     ) -> None:
-        # Support both aiogram 3.3 and 3.7+ initializer signatures
-        self.bot = Bot(token=token, **_DEFAULT_KW)
+        # Support both aiogram 3.3 and 3.7+ initializer signatures.
+        # ujson (C) speeds up encoding every outgoing request and decoding updates
+        session = AiohttpSession(json_loads=ujson.loads, json_dumps=ujson.dumps)
+        self.bot = Bot(token=token, session=session, **_DEFAULT_KW)
         self.storage = MemoryStorage()
         self.dispatcher = Dispatcher(storage=self.storage)
         self.rate_limit = rate_limit
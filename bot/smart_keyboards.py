@@ -2,12 +2,30 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
 from database.repositories import get_participant_status
 
 
+# Главная кнопка меню в зависимости от статуса регистрации
+_MAIN_MENU_PRIMARY_BUTTON = {
+    None: "🚀 Начать регистрацию",      # Незарегистрированный пользователь
+    "pending": "⏳ Мой статус",          # Заявка на модерации
+    "approved": "✅ Мой статус",         # Одобренный участник
+    "rejected": "🔄 Подать заявку снова",  # Отклоненная заявка
+}
+
+# Подсказка в поле ввода главного меню
+_MAIN_MENU_HINTS = {
+    None: "Начните с регистрации для участия в розыгрыше!",
+    "pending": "Ваша заявка рассматривается. Проверяйте статус!",
+    "approved": "Поздравляем! Вы участник розыгрыша!",
+    "rejected": "Исправьте заявку и подайте повторно",
+}
+
+
 class SmartKeyboardBuilder:
     """Конструктор умных клавиатур с адаптивным интерфейсом"""
     
@@ -132,47 +150,24 @@ class AdaptiveKeyboards:
     async def get_main_menu_keyboard(telegram_id: int) -> ReplyKeyboardMarkup:
         """Главное меню с адаптацией под статус пользователя"""
         user_status = await get_participant_status(telegram_id)
-        
+        return AdaptiveKeyboards.main_menu_keyboard_for_status(user_status)
+    
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def main_menu_keyboard_for_status(user_status: Optional[str]) -> ReplyKeyboardMarkup:
+        """Главное меню для статуса участника (общий объект, не изменять)"""
+        primary = _MAIN_MENU_PRIMARY_BUTTON.get(user_status)
         keyboard = []
-        
-        # Кнопки в зависимости от статуса регистрации
-        if user_status is None:
-            # Незарегистрированный пользователь
-            keyboard.extend([
-                [KeyboardButton(text="🚀 Начать регистрацию")],
+        if primary is not None:
+            keyboard = [
+                [KeyboardButton(text=primary)],
                 [KeyboardButton(text="📊 О розыгрыше"), KeyboardButton(text="💬 Поддержка")]
-            ])
-        elif user_status == "pending":
-            # Заявка на модерации
-            keyboard.extend([
-                [KeyboardButton(text="⏳ Мой статус")],
-                [KeyboardButton(text="📊 О розыгрыше"), KeyboardButton(text="💬 Поддержка")]
-            ])
-        elif user_status == "approved":
-            # Одобренный участник
-            keyboard.extend([
-                [KeyboardButton(text="✅ Мой статус")],
-                [KeyboardButton(text="📊 О розыгрыше"), KeyboardButton(text="💬 Поддержка")]
-            ])
-        elif user_status == "rejected":
-            # Отклоненная заявка
-            keyboard.extend([
-                [KeyboardButton(text="🔄 Подать заявку снова")],
-                [KeyboardButton(text="📊 О розыгрыше"), KeyboardButton(text="💬 Поддержка")]
-            ])
-        
-        # Определяем подсказку
-        hints = {
-            None: "Начните с регистрации для участия в розыгрыше!",
-            "pending": "Ваша заявка рассматривается. Проверяйте статус!",
-            "approved": "Поздравляем! Вы участник розыгрыша!",
-            "rejected": "Исправьте заявку и подайте повторно"
-        }
+            ]
         
         return ReplyKeyboardMarkup(
             keyboard=keyboard,
             resize_keyboard=True,
-            input_field_placeholder=f"🎯 {hints.get(user_status, 'Выберите действие')}"
+            input_field_placeholder=f"🎯 {_MAIN_MENU_HINTS.get(user_status, 'Выберите действие')}"
         )
     
     @staticmethod
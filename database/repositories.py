@@ -50,6 +50,22 @@ class ParticipantRepository(BaseRepository):
             (telegram_id,)
         )
     
+    @staticmethod
+    async def get_statuses(telegram_ids: Sequence[int]) -> Dict[int, Optional[str]]:
+        """Get participant statuses for several telegram_ids in one query."""
+        if not telegram_ids:
+            return {}
+        
+        placeholders = ",".join(["?"] * len(telegram_ids))
+        rows = await BaseRepository.fetch_all(
+            f"SELECT telegram_id, status FROM participants "
+            f"WHERE telegram_id IN ({placeholders})",
+            tuple(telegram_ids)
+        )
+        statuses: Dict[int, Optional[str]] = {telegram_id: None for telegram_id in telegram_ids}
+        statuses.update((row[0], row[1]) for row in rows)
+        return statuses
+    
     @staticmethod
     async def get_approved(limit: Optional[int] = None) -> List[Tuple[int, int]]:
         """Get approved participants."""
@@ -185,6 +201,11 @@ async def get_participant_status(telegram_id: int) -> Optional[str]:
     return await ParticipantRepository.get_status(telegram_id)
 
 
+async def get_participant_statuses(telegram_ids: Sequence[int]) -> Dict[int, Optional[str]]:
+    """Legacy: Get participant statuses in bulk."""
+    return await ParticipantRepository.get_statuses(telegram_ids)
+
+
 async def get_broadcast_recipients(status: str = "approved") -> List[int]:
     """Legacy: Get broadcast recipients."""
     return await ParticipantRepository.get_telegram_ids_by_status(status)
@@ -5,6 +5,11 @@ from __future__ import annotations
 import asyncio
 import logging
 
+try:
+    import uvloop
+except ImportError:  # optional: falls back to the stock asyncio loop
+    uvloop = None
+
 from core import setup_logger, ApplicationInitializer
 from services import set_main_loop
 
@@ -30,6 +35,8 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
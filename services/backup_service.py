@@ -1,18 +1,51 @@
 """Automatic backup service for database and critical files."""
 
 import asyncio
+import hashlib
 import shutil
 import sqlite3
+import struct
 import gzip
 import logging
+import os
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import json
 
+try:
+    import zstandard
+except ImportError:  # optional: backups fall back to gzip
+    zstandard = None
+
 
 logger = logging.getLogger(__name__)
 
+CODEC_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+ZSTD_LEVEL = 3
+
+INCREMENTAL_MANIFEST = "incremental_manifest.json"
+INCREMENTAL_PREFIX = "lottery_bot_incremental_"
+# Deltas per chain before the next run rebases onto a fresh full snapshot
+INCREMENTAL_MAX_DELTAS = 24
+# Page delta blob layout: header (page_size, page_count), then (page_number, page bytes) records
+_DELTA_HEADER = struct.Struct(">II")
+_DELTA_PAGE = struct.Struct(">I")
+
+
+def _open_compressed(path: Path, mode: str = "rb", **kwargs):
+    """Open a backup file, choosing the codec from its suffix (.zst, .gz or plain)."""
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to open {path.name}")
+        if "w" in mode:
+            # Framed multi-threaded compression across all cores
+            kwargs.setdefault("cctx", zstandard.ZstdCompressor(level=ZSTD_LEVEL, threads=-1))
+        return zstandard.open(path, mode, **kwargs)
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, **kwargs)
+    return open(path, mode, **kwargs)
+
 
 class BackupService:
     """Service for automatic database and file backups."""
@@ -23,13 +56,27 @@ class BackupService:
         backup_dir: str = "backups",
         max_age_days: int = 2,
         backup_interval_hours: int = 6,
-        compress: bool = True
+        compress: bool = True,
+        codec: str = "zstd",
+        step_pages: int = -1,
+        step_sleep_ms: float = 250,
+        max_incremental_deltas: int = INCREMENTAL_MAX_DELTAS
     ):
         self.db_path = Path(db_path)
         self.backup_dir = Path(backup_dir)
         self.max_age_days = max_age_days
         self.backup_interval = backup_interval_hours * 3600  # Convert to seconds
         self.compress = compress
+        if codec not in CODEC_SUFFIXES:
+            raise ValueError(f"Unknown backup codec: {codec}")
+        if codec == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, falling back to gzip compression")
+            codec = "gzip"
+        self.codec = codec
+        # SQLite online backup: pages copied per step and pause between steps
+        self.step_pages = step_pages
+        self.step_sleep_ms = step_sleep_ms
+        self.max_incremental_deltas = max_incremental_deltas
         self.running = False
         self.backup_task: Optional[asyncio.Task] = None
         
@@ -43,9 +90,23 @@ class BackupService:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"lottery_bot_backup_{timestamp}{suffix}"
         if self.compress:
-            filename += ".gz"
+            filename += CODEC_SUFFIXES[self.codec]
         return filename
     
+    def _copy_database(self, source_conn: sqlite3.Connection, backup_conn: sqlite3.Connection) -> None:
+        """Copy database pages in steps of ``step_pages`` using the online backup API."""
+        source_conn.backup(
+            backup_conn,
+            pages=self.step_pages,
+            sleep=self.step_sleep_ms / 1000
+        )
+    
+    def _compress_file(self, source_path: Path, backup_path: Path) -> None:
+        """Stream ``source_path`` into ``backup_path`` using the configured codec."""
+        with open(source_path, 'rb') as f_in:
+            with _open_compressed(backup_path, 'wb') as f_out:
+                shutil.copyfileobj(f_in, f_out, length=1 << 20)
+    
     def backup_database(self) -> Path:
         """Create a backup of the SQLite database."""
         if not self.db_path.exists():
@@ -60,22 +121,20 @@ class BackupService:
             
             if self.compress:
                 # Create temporary file for backup, then compress
-                temp_backup = self.backup_dir / f"temp_{backup_filename.replace('.gz', '')}"
+                temp_backup = self.backup_dir / f"temp_{backup_path.stem}"
                 backup_conn = sqlite3.connect(temp_backup)
-                source_conn.backup(backup_conn)
+                self._copy_database(source_conn, backup_conn)
                 backup_conn.close()
                 
                 # Compress the backup
-                with open(temp_backup, 'rb') as f_in:
-                    with gzip.open(backup_path, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
+                self._compress_file(temp_backup, backup_path)
                 
                 # Remove temporary file
                 temp_backup.unlink()
             else:
                 # Direct backup without compression
                 backup_conn = sqlite3.connect(backup_path)
-                source_conn.backup(backup_conn)
+                self._copy_database(source_conn, backup_conn)
                 backup_conn.close()
             
             source_conn.close()
@@ -105,9 +164,7 @@ class BackupService:
                 
                 try:
                     if self.compress:
-                        with open(source_path, 'rb') as f_in:
-                            with gzip.open(backup_path, 'wb') as f_out:
-                                shutil.copyfileobj(f_in, f_out)
+                        self._compress_file(source_path, backup_path)
                     else:
                         shutil.copy2(source_path, backup_path)
                     
@@ -131,9 +188,10 @@ class BackupService:
         try:
             import tarfile
             
-            # Create tar archive
-            with tarfile.open(backup_path, 'w:gz' if self.compress else 'w') as tar:
-                tar.add(uploads_dir, arcname='uploads')
+            # Create tar archive, streamed through the backup codec
+            with _open_compressed(backup_path, 'wb') as f_out:
+                with tarfile.open(fileobj=f_out, mode='w|') as tar:
+                    tar.add(uploads_dir, arcname='uploads')
             
             logger.info(f"Uploads backup created: {backup_path}")
             return backup_path
@@ -153,18 +211,15 @@ class BackupService:
             "config_backups": [str(f.name) for f in config_backups],
             "uploads_backup": str(uploads_backup.name) if uploads_backup else None,
             "compressed": self.compress,
+            "codec": self.codec if self.compress else None,
             "total_files": 1 + len(config_backups) + (1 if uploads_backup else 0)
         }
         
         try:
             manifest_content = json.dumps(manifest, indent=2, ensure_ascii=False)
             
-            if self.compress:
-                with gzip.open(manifest_path, 'wt', encoding='utf-8') as f:
-                    f.write(manifest_content)
-            else:
-                with open(manifest_path, 'w', encoding='utf-8') as f:
-                    f.write(manifest_content)
+            with _open_compressed(manifest_path, 'wt', encoding='utf-8') as f:
+                f.write(manifest_content)
             
             logger.debug(f"Backup manifest created: {manifest_path}")
             return manifest_path
@@ -173,17 +228,44 @@ class BackupService:
             logger.warning(f"Failed to create backup manifest: {e}")
             return manifest_path
     
+    @staticmethod
+    def _remove_files(entries: List[os.DirEntry]) -> Tuple[int, int]:
+        """Unlink collected backup files; return (removed count, freed bytes)."""
+        removed_count = 0
+        removed_size = 0
+        for entry in entries:
+            try:
+                file_size = entry.stat().st_size
+                os.unlink(entry.path)
+                removed_count += 1
+                removed_size += file_size
+                logger.debug(f"Removed old backup: {entry.name}")
+            except Exception as e:
+                logger.warning(f"Failed to remove old backup {entry.path}: {e}")
+        return removed_count, removed_size
+    
     def cleanup_old_backups(self):
-        """Keep only the latest 2 backup sets (based on manifest files)."""
+        """Keep only the latest 2 backup sets (based on manifest files) and the current incremental chain."""
         try:
+            # Single directory scan; DirEntry caches stat results for the later passes
+            backup_entries = []
+            incremental_entries = []
+            for entry in os.scandir(self.backup_dir):
+                if not entry.is_file():
+                    continue
+                if entry.name.startswith("lottery_bot_backup_"):
+                    backup_entries.append(entry)
+                elif entry.name.startswith(INCREMENTAL_PREFIX):
+                    incremental_entries.append(entry)
+            
+            self._cleanup_incremental_blobs(incremental_entries)
+            
             # Find all manifest files to identify backup sets
-            manifest_files = []
-            for file_path in self.backup_dir.iterdir():
-                if file_path.is_file() and file_path.name.startswith("lottery_bot_backup_") and "_manifest.json" in file_path.name:
-                    manifest_files.append(file_path)
+            manifest_entries = [entry for entry in backup_entries if "_manifest.json" in entry.name]
             
             # Sort by creation time (newest first)
-            manifest_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
+            manifest_entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+            manifest_files = [Path(entry.path) for entry in manifest_entries]
             
             # Keep only the latest 2 backup sets
             keep_count = 2
@@ -197,15 +279,9 @@ class BackupService:
             for manifest_file in manifest_files[:keep_count]:
                 # Parse manifest to get all related files
                 try:
-                    # Try to read as gzip first, then as regular JSON
-                    manifest_data = None
-                    try:
-                        with gzip.open(manifest_file, 'rt', encoding='utf-8') as f:
-                            manifest_data = json.load(f)
-                    except (gzip.BadGzipFile, OSError):
-                        # Not a gzip file, try as regular JSON
-                        with open(manifest_file, 'r', encoding='utf-8') as f:
-                            manifest_data = json.load(f)
+                    # Codec follows the suffix; legacy .gz manifests stay readable
+                    with _open_compressed(manifest_file, 'rt', encoding='utf-8') as f:
+                        manifest_data = json.load(f)
                     
                     if manifest_data:
                         # Add manifest file itself
@@ -226,21 +302,9 @@ class BackupService:
                     # Keep the manifest file anyway to be safe
                     files_to_keep.add(manifest_file.name)
             
-            # Remove old backup files
-            removed_count = 0
-            removed_size = 0
-            
-            for file_path in self.backup_dir.iterdir():
-                if file_path.is_file() and file_path.name.startswith("lottery_bot_backup_"):
-                    if file_path.name not in files_to_keep:
-                        try:
-                            file_size = file_path.stat().st_size
-                            file_path.unlink()
-                            removed_count += 1
-                            removed_size += file_size
-                            logger.debug(f"Removed old backup: {file_path.name}")
-                        except Exception as e:
-                            logger.warning(f"Failed to remove old backup {file_path}: {e}")
+            # Remove old backup files in one batch
+            expired_entries = [entry for entry in backup_entries if entry.name not in files_to_keep]
+            removed_count, removed_size = self._remove_files(expired_entries)
             
             if removed_count > 0:
                 removed_mb = removed_size / (1024 * 1024)
@@ -251,6 +315,134 @@ class BackupService:
         except Exception as e:
             logger.error(f"Failed to cleanup old backups: {e}")
     
+    def _cleanup_incremental_blobs(self, entries: List[os.DirEntry]) -> None:
+        """Remove delta blobs that the incremental manifest no longer references."""
+        try:
+            chain = set(self._load_incremental_manifest()["snapshots"])
+        except Exception as e:
+            logger.warning(f"Failed to read incremental manifest, keeping delta blobs: {e}")
+            return
+        
+        orphaned = [entry for entry in entries if entry.name not in chain]
+        removed_count, removed_size = self._remove_files(orphaned)
+        if removed_count > 0:
+            removed_mb = removed_size / (1024 * 1024)
+            logger.info(f"🧹 Removed {removed_count} orphaned incremental blobs ({removed_mb:.1f} MB freed)")
+    
+    def _load_incremental_manifest(self) -> dict:
+        """Load the page-hash manifest for incremental backups."""
+        manifest_path = self.backup_dir / INCREMENTAL_MANIFEST
+        if not manifest_path.exists():
+            return {"page_size": None, "page_count": 0, "hashes": [], "snapshots": []}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def create_incremental_backup(self) -> Optional[Path]:
+        """Write only the database pages changed since the previous incremental run.
+        
+        A consistent snapshot is taken with the online backup API, every page is
+        hashed and compared with the manifest; changed pages go into a delta blob.
+        The first run, a page size change after VACUUM, or a chain that already
+        holds ``max_incremental_deltas`` blobs stores all pages and starts a new
+        chain; the superseded blobs are removed once the new manifest is written.
+        """
+        if not self.db_path.exists():
+            raise FileNotFoundError(f"Database file not found: {self.db_path}")
+        
+        # Microseconds keep delta names unique when runs follow each other quickly
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        snapshot_path = self.backup_dir / f"temp_incremental_{timestamp}.sqlite"
+        delta_path = self.backup_dir / f"{INCREMENTAL_PREFIX}{timestamp}.bin"
+        
+        try:
+            source_conn = sqlite3.connect(self.db_path)
+            snapshot_conn = sqlite3.connect(snapshot_path)
+            try:
+                self._copy_database(source_conn, snapshot_conn)
+                page_size = snapshot_conn.execute("PRAGMA page_size").fetchone()[0]
+                page_count = snapshot_conn.execute("PRAGMA page_count").fetchone()[0]
+            finally:
+                snapshot_conn.close()
+                source_conn.close()
+            
+            manifest = self._load_incremental_manifest()
+            superseded: List[str] = []
+            if (
+                manifest["page_size"] != page_size
+                or len(manifest["snapshots"]) >= self.max_incremental_deltas
+            ):
+                # New baseline: previous deltas are no longer needed for a restore
+                superseded = manifest["snapshots"]
+                manifest = {"page_size": page_size, "page_count": 0, "hashes": [], "snapshots": []}
+            old_hashes = manifest["hashes"]
+            
+            new_hashes = []
+            changed = 0
+            with open(snapshot_path, 'rb') as f_in, open(delta_path, 'wb') as f_out:
+                f_out.write(_DELTA_HEADER.pack(page_size, page_count))
+                for page_number in range(1, page_count + 1):
+                    page = f_in.read(page_size)
+                    digest = hashlib.blake2b(page, digest_size=16).hexdigest()
+                    new_hashes.append(digest)
+                    if page_number > len(old_hashes) or old_hashes[page_number - 1] != digest:
+                        f_out.write(_DELTA_PAGE.pack(page_number))
+                        f_out.write(page)
+                        changed += 1
+            
+            manifest.update({
+                "page_size": page_size,
+                "page_count": page_count,
+                "hashes": new_hashes,
+            })
+            manifest["snapshots"].append(delta_path.name)
+            
+            manifest_path = self.backup_dir / INCREMENTAL_MANIFEST
+            temp_manifest = manifest_path.with_suffix(".tmp")
+            with open(temp_manifest, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f)
+            temp_manifest.replace(manifest_path)
+            
+            for snapshot_name in superseded:
+                (self.backup_dir / snapshot_name).unlink(missing_ok=True)
+            
+            logger.info(f"Incremental backup created: {delta_path} ({changed}/{page_count} pages changed)")
+            return delta_path
+            
+        except Exception as e:
+            logger.error(f"Failed to create incremental backup: {e}")
+            delta_path.unlink(missing_ok=True)
+            raise
+        finally:
+            snapshot_path.unlink(missing_ok=True)
+    
+    def restore_incremental_backup(self, target_path: str) -> Path:
+        """Rebuild the database by applying incremental page deltas in order."""
+        manifest = self._load_incremental_manifest()
+        if not manifest["snapshots"]:
+            raise FileNotFoundError("No incremental backups found")
+        
+        target = Path(target_path)
+        page_size = manifest["page_size"]
+        page_count = 0
+        
+        with open(target, 'wb') as f_out:
+            for snapshot_name in manifest["snapshots"]:
+                with open(self.backup_dir / snapshot_name, 'rb') as f_in:
+                    blob_page_size, page_count = _DELTA_HEADER.unpack(f_in.read(_DELTA_HEADER.size))
+                    if blob_page_size != page_size:
+                        raise ValueError(f"Page size mismatch in {snapshot_name}")
+                    while True:
+                        record = f_in.read(_DELTA_PAGE.size)
+                        if not record:
+                            break
+                        (page_number,) = _DELTA_PAGE.unpack(record)
+                        f_out.seek((page_number - 1) * page_size)
+                        f_out.write(f_in.read(page_size))
+            f_out.truncate(page_count * page_size)
+        
+        logger.info(f"Database restored from {len(manifest['snapshots'])} incremental backups: {target}")
+        return target
+    
     def create_full_backup(self) -> bool:
         """Create a complete backup of all critical data."""
         try:
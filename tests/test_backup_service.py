@@ -0,0 +1,175 @@
+"""Unit tests for BackupService."""
+
+import gzip
+import json
+import os
+import sqlite3
+
+import pytest
+
+from services.backup_service import BackupService
+
+
+@pytest.fixture
+def source_db(tmp_path):
+    """Small SQLite database spanning several pages."""
+    db_path = tmp_path / "lottery_bot.sqlite"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE participants (id INTEGER PRIMARY KEY, full_name TEXT)")
+    conn.executemany(
+        "INSERT INTO participants (full_name) VALUES (?)",
+        [(f"Участник {i}" * 10,) for i in range(500)]
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def _count_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM participants").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_stepped_backup_copies_all_pages(source_db, tmp_path):
+    """Backups copied in small page steps are complete."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=False,
+        step_pages=2,
+        step_sleep_ms=0
+    )
+
+    backup_path = service.backup_database()
+
+    assert _count_rows(backup_path) == 500
+
+
+def test_compressed_backup_is_gzip(source_db, tmp_path):
+    """Compressed database backups are written as gzip."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=True,
+        codec="gzip"
+    )
+
+    backup_path = service.backup_database()
+    restored = tmp_path / "restored.sqlite"
+    with gzip.open(backup_path, "rb") as f_in:
+        restored.write_bytes(f_in.read())
+
+    assert backup_path.suffix == ".gz"
+    assert _count_rows(restored) == 500
+
+
+def test_compressed_backup_is_zstd(source_db, tmp_path):
+    """zstd is the default codec and round-trips the database."""
+    zstandard = pytest.importorskip("zstandard")
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=True
+    )
+
+    backup_path = service.backup_database()
+    restored = tmp_path / "restored.sqlite"
+    with zstandard.open(backup_path, "rb") as f_in:
+        restored.write_bytes(f_in.read())
+
+    assert backup_path.suffix == ".zst"
+    assert _count_rows(restored) == 500
+
+
+def test_incremental_backup_stores_only_changed_pages(source_db, tmp_path):
+    """Second incremental run writes fewer pages and restores correctly."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=False
+    )
+
+    baseline = service.create_incremental_backup()
+
+    conn = sqlite3.connect(source_db)
+    conn.execute("UPDATE participants SET full_name = 'Изменено' WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    delta = service.create_incremental_backup()
+    restored = service.restore_incremental_backup(str(tmp_path / "restored.sqlite"))
+
+    assert delta.stat().st_size < baseline.stat().st_size
+    assert _count_rows(restored) == 500
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT full_name FROM participants WHERE id = 1").fetchone()[0] == "Изменено"
+    conn.close()
+
+
+def test_cleanup_keeps_latest_two_backup_sets(source_db, tmp_path):
+    """Files outside the two newest manifest-backed sets are removed."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=False
+    )
+
+    for index in range(3):
+        stamp = f"2025010{index + 1}_000000"
+        db_name = f"lottery_bot_backup_{stamp}.db"
+        (service.backup_dir / db_name).write_bytes(b"x" * 10)
+        manifest = service.backup_dir / f"lottery_bot_backup_{stamp}_manifest.json"
+        manifest.write_text(json.dumps({"database_backup": db_name, "config_backups": []}))
+        os.utime(manifest, (index, index))
+
+    service.cleanup_old_backups()
+
+    remaining = sorted(p.name for p in service.backup_dir.iterdir())
+    assert "lottery_bot_backup_20250101_000000.db" not in remaining
+    assert "lottery_bot_backup_20250103_000000.db" in remaining
+    assert len(remaining) == 4
+
+
+def test_incremental_chain_is_bounded(source_db, tmp_path):
+    """Long incremental runs rebase onto a full snapshot and drop old deltas."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=False,
+        max_incremental_deltas=3
+    )
+
+    for run in range(8):
+        conn = sqlite3.connect(source_db)
+        conn.execute("UPDATE participants SET full_name = ? WHERE id = 1", (f"Запуск {run}",))
+        conn.commit()
+        conn.close()
+        service.create_incremental_backup()
+
+    blobs = [p for p in service.backup_dir.iterdir() if p.name.startswith("lottery_bot_incremental_")]
+    assert len(blobs) <= 3
+
+    restored = service.restore_incremental_backup(str(tmp_path / "restored.sqlite"))
+    conn = sqlite3.connect(restored)
+    assert conn.execute("SELECT full_name FROM participants WHERE id = 1").fetchone()[0] == "Запуск 7"
+    conn.close()
+
+
+def test_cleanup_removes_orphaned_incremental_blobs(source_db, tmp_path):
+    """Delta blobs outside the current chain are removed by cleanup."""
+    service = BackupService(
+        db_path=str(source_db),
+        backup_dir=str(tmp_path / "backups"),
+        compress=False
+    )
+    current = service.create_incremental_backup()
+    orphan = service.backup_dir / "lottery_bot_incremental_20250101_000000_000000.bin"
+    orphan.write_bytes(b"x" * 10)
+
+    service.cleanup_old_backups()
+
+    assert current.exists()
+    assert not orphan.exists()
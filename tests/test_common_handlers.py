@@ -0,0 +1,142 @@
+"""Unit tests for common informational handlers."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Dispatcher
+
+import bot.handlers.common as common_module
+from bot.callbacks import InfoCallback, InfoSection
+from bot.handlers.common import CommonHandlers
+from services.cache import MultiLevelCache
+
+
+def _callback(data):
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=1),
+        message_id=10,
+        document=None,
+        edit_text=AsyncMock(),
+        edit_caption=AsyncMock(),
+    )
+    return SimpleNamespace(data=data, message=message, answer=AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_repeated_info_tap_skips_edit():
+    """Pressing the same info button twice edits the message only once."""
+    common_module._last_info_edit.clear()
+    handlers = CommonHandlers()
+    callback_data = InfoCallback(section=InfoSection.RULES)
+    callback = _callback(callback_data.pack())
+
+    await handlers.handle_info_callback(callback, callback_data)
+    await handlers.handle_info_callback(callback, callback_data)
+
+    assert callback.message.edit_text.await_count == 1
+    assert callback.answer.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_legacy_info_callback_shows_section():
+    """Buttons sent before the CallbackData switch still open their section."""
+    common_module._last_info_edit.clear()
+    callback = _callback("info_prizes")
+
+    await CommonHandlers().handle_legacy_info_callback(callback)
+
+    text = callback.message.edit_text.await_args.args[0]
+    assert text.startswith("🏆 *Приз розыгрыша*")
+
+
+@pytest.fixture
+def status_lookup(monkeypatch):
+    """Stub repository status lookup behind a fresh cache."""
+    lookup = AsyncMock(return_value="approved")
+    cache = MultiLevelCache(hot_ttl=10, warm_ttl=60, cold_ttl=300)
+    monkeypatch.setattr(common_module, "get_participant_status", lookup)
+    monkeypatch.setattr(common_module, "get_cache", lambda: cache)
+    monkeypatch.setattr(common_module, "get_context_manager", lambda: None)
+    return lookup
+
+
+def _status_message():
+    return SimpleNamespace(from_user=SimpleNamespace(id=1), answer=AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_status_handler_builds_status_text(status_lookup):
+    """Status reply combines the label and the detail line."""
+    message = _status_message()
+
+    await CommonHandlers().status_handler(message)
+
+    text = message.answer.await_args.args[0]
+    assert text == "✅ Ваш статус участия: ✅ Одобрена\n\n🎉 Поздравляем! Вы участвуете в розыгрыше!"
+
+
+@pytest.mark.asyncio
+async def test_repeated_status_checks_hit_cache(status_lookup):
+    """Repeated status taps within the TTL query the database once."""
+    handlers = CommonHandlers()
+
+    await handlers.status_handler(_status_message())
+    await handlers.status_handler(_status_message())
+
+    assert status_lookup.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_results_redirect_sends_single_message(monkeypatch):
+    """The old results button gets one reply with the support menu."""
+    monkeypatch.setattr(common_module, "get_context_manager", lambda: None)
+    message = SimpleNamespace(from_user=SimpleNamespace(id=1), answer=AsyncMock())
+
+    await CommonHandlers().handle_results_redirect(message)
+
+    assert message.answer.await_count == 1
+    assert message.answer.await_args.args[0].startswith("🔄 Эта функция была обновлена!")
+
+
+@pytest.mark.asyncio
+async def test_rules_pdf_is_uploaded_once(tmp_path, monkeypatch):
+    """After the first upload the rules PDF is resent by file_id."""
+    pdf_path = tmp_path / "rules.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4")
+    monkeypatch.setattr(common_module, "_RULES_PDF_PATH", str(pdf_path))
+    sent = SimpleNamespace(document=SimpleNamespace(file_id="cached-file-id"))
+    message = SimpleNamespace(answer_document=AsyncMock(return_value=sent), answer=AsyncMock())
+    handlers = CommonHandlers()
+
+    await handlers.show_info_menu(message)
+    await handlers.show_info_menu(message)
+
+    documents = [call.kwargs["document"] for call in message.answer_document.await_args_list]
+    assert isinstance(documents[0], common_module.FSInputFile)
+    assert documents[1] == "cached-file-id"
+
+
+def test_setup_includes_router_once():
+    """Repeated setup keeps a single common router in the dispatcher."""
+    dispatcher = Dispatcher()
+    handlers = CommonHandlers()
+
+    handlers.setup(dispatcher)
+    handlers.setup(dispatcher)
+
+    assert dispatcher.sub_routers == [handlers.router]
+
+
+@pytest.mark.asyncio
+async def test_info_callback_is_answered_when_edit_fails():
+    """The button spinner is cleared even if editing the message fails."""
+    common_module._last_info_edit.clear()
+    callback = _callback("info_rules")
+    callback.message.edit_text.side_effect = RuntimeError("edit failed")
+
+    with pytest.raises(RuntimeError):
+        await CommonHandlers().handle_legacy_info_callback(callback)
+
+    callback.answer.assert_awaited_once()
+    assert not common_module._last_info_edit
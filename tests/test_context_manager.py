@@ -0,0 +1,157 @@
+"""Unit tests for ContextManager session storage."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import bot.context_manager as context_module
+from bot.context_manager import ContextManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    """Context manager with a stubbed participant status lookup."""
+    calls = []
+
+    async def fake_statuses(telegram_ids):
+        calls.append(list(telegram_ids))
+        return {telegram_id: None for telegram_id in telegram_ids}
+
+    monkeypatch.setattr(context_module, "get_participant_statuses", fake_statuses)
+    cm = ContextManager()
+    cm.status_calls = calls
+    return cm
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_bounded(manager):
+    """Oldest sessions are evicted once the cap is reached."""
+    manager.MAX_SESSIONS = 3
+
+    for telegram_id in range(5):
+        await manager.get_or_create_session(telegram_id)
+
+    assert list(manager.sessions) == [2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_status_lookups_are_batched(manager):
+    """Concurrent first-touch sessions share one status query."""
+    await asyncio.gather(*(manager.get_or_create_session(i) for i in (1, 2, 3, 2)))
+
+    assert manager.status_calls == [[1, 2, 3]]
+    assert set(manager.sessions) == {1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_session_hit_refreshes_lru_order(manager):
+    """Accessing a session moves it to the most recently used position."""
+    manager.MAX_SESSIONS = 2
+
+    await manager.get_or_create_session(1)
+    await manager.get_or_create_session(2)
+    await manager.get_or_create_session(1)
+    await manager.get_or_create_session(3)
+
+    assert list(manager.sessions) == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_expired_sessions_are_swept(manager):
+    """Stale sessions are lazily dropped on insert."""
+    manager.SWEEP_EVERY = 1
+
+    stale = await manager.get_or_create_session(1)
+    stale.last_message_time = time.monotonic() - 3 * 3600
+    await manager.get_or_create_session(2)
+
+    assert list(manager.sessions) == [2]
+
+
+class _State:
+    """Minimal FSMContext stand-in."""
+
+    def __init__(self, value=None):
+        self.value = value
+
+    async def get_state(self):
+        return self.value
+
+
+@pytest.mark.asyncio
+async def test_detect_user_confusion_generic_phrases(manager):
+    """Generic phrases combined with repeated navigation mark confusion."""
+    session = await manager.get_or_create_session(1)
+    message = SimpleNamespace(text="Не Понимаю ничего", photo=None, contact=None)
+
+    assert not await manager.detect_user_confusion(session, message, _State())
+
+    session.breadcrumbs.extend(["idle→support"] * 3)
+    assert await manager.detect_user_confusion(manager.peek_session(1), message, _State())
+
+
+@pytest.mark.asyncio
+async def test_update_context_applies_after_session_creation(manager):
+    """Updates for unknown users are applied once the session exists."""
+    manager.update_context(1, context_module.UserContext.SUPPORT, context_module.UserAction.BUTTON_CLICK)
+    assert 1 not in manager.sessions
+
+    await asyncio.sleep(0.05)
+    assert manager.sessions[1].current_context is context_module.UserContext.SUPPORT
+
+    manager.increment_error_count(1)
+    assert manager.sessions[1].consecutive_errors == 1
+
+
+@pytest.mark.asyncio
+async def test_updates_for_new_user_share_one_creation_task(manager):
+    """Several updates before the session exists are applied in order by one task."""
+    manager.update_context(1, context_module.UserContext.SUPPORT, context_module.UserAction.BUTTON_CLICK)
+    manager.increment_error_count(1)
+    manager.update_context(1, context_module.UserContext.NAVIGATION, context_module.UserAction.UNEXPECTED)
+
+    assert len(manager._background_tasks) == 1
+    await asyncio.sleep(0.05)
+
+    session = manager.sessions[1]
+    assert session.current_context is context_module.UserContext.NAVIGATION
+    assert session.consecutive_errors == 1
+    assert list(session.breadcrumbs) == ["idle→support", "support→navigation"]
+
+
+@pytest.mark.asyncio
+async def test_session_hit_extends_lifetime(manager):
+    """Reading a session marks it active, so the lazy sweep keeps it."""
+    manager.SWEEP_EVERY = 1
+
+    session = await manager.get_or_create_session(1)
+    session.last_message_time = time.monotonic() - manager.SESSION_TTL_SECONDS + 1
+    assert await manager.get_or_create_session(1) is session
+    assert time.monotonic() - session.last_message_time < 1
+
+    await manager.get_or_create_session(2)
+    assert list(manager.sessions) == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_expired_session_is_not_returned_on_hit(manager):
+    """An expired session is replaced rather than handed out."""
+    stale = await manager.get_or_create_session(1)
+    stale.last_message_time = time.monotonic() - 3 * 3600
+
+    assert await manager.get_or_create_session(1) is not stale
+
+
+@pytest.mark.asyncio
+async def test_deferred_updates_apply_before_later_ones(manager):
+    """Queued updates land when the session is inserted, ahead of newer updates."""
+    manager.update_context(1, context_module.UserContext.SUPPORT, context_module.UserAction.BUTTON_CLICK)
+
+    session = await manager.get_or_create_session(1)
+    assert session.current_context is context_module.UserContext.SUPPORT
+
+    manager.update_context(1, context_module.UserContext.NAVIGATION, context_module.UserAction.BUTTON_CLICK)
+    await asyncio.sleep(0.05)
+    assert session.current_context is context_module.UserContext.NAVIGATION
@@ -0,0 +1,233 @@
+"""Unit tests for the fallback handlers."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram import Dispatcher
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.enums import ContentType
+
+import bot.handlers.fallback_fixed as fallback_module
+from bot.handlers.fallback_fixed import FixedSmartFallbackHandler
+from bot.states import RegistrationStates
+from services.cache import MultiLevelCache
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """Fallback handler with the content reply replaced by a mock."""
+    monkeypatch.setattr(FixedSmartFallbackHandler, "handle_unexpected_content", AsyncMock())
+    return FixedSmartFallbackHandler()
+
+
+@pytest.mark.asyncio
+async def test_dispatch_routes_by_content_type(handler):
+    """Messages go to the handler registered for their content type."""
+    message = SimpleNamespace(content_type=ContentType.STICKER)
+
+    await handler._dispatch_by_content_type(message, state=None, raw_state="SupportStates:entering_message")
+
+    handler.handle_unexpected_content.assert_awaited_once_with(
+        message, None, "SupportStates:entering_message", fallback_module._CONTENT_META[ContentType.STICKER]
+    )
+
+
+@pytest.mark.asyncio
+async def test_registration_photo_is_left_unhandled(handler):
+    """Photos in upload_photo propagate to the registration router."""
+    message = SimpleNamespace(content_type=ContentType.PHOTO)
+
+    with pytest.raises(SkipHandler):
+        await handler._dispatch_by_content_type(
+            message, state=None, raw_state=RegistrationStates.upload_photo.state
+        )
+
+    handler.handle_unexpected_content.assert_not_awaited()
+
+
+def test_setup_cycles_witty_responses():
+    """Witty replies from the context manager are handed out in turn."""
+    fallback = FixedSmartFallbackHandler()
+    dispatcher = SimpleNamespace(include_router=lambda router: None)
+
+    fallback.setup(dispatcher)
+
+    witty = fallback._ctx().get_witty_responses()
+    stickers = witty["sticker_in_registration"]
+    picked = [next(fallback._witty["sticker_in_registration"]) for _ in range(len(stickers) + 1)]
+    assert sorted(picked[:-1]) == sorted(stickers)
+    assert picked[-1] == picked[0]
+    assert next(fallback._witty["confusion_general"]) in witty["confusion_general"]
+
+
+@pytest.mark.asyncio
+async def test_media_reply_names_content_type(monkeypatch):
+    """Media replies name the content type without probing message attributes."""
+    monkeypatch.setattr("bot.handlers.fallback_fixed.get_context_manager", lambda: None)
+    message = SimpleNamespace(
+        content_type=ContentType.AUDIO, photo=None, contact=None, text=None, answer=AsyncMock()
+    )
+
+    await FixedSmartFallbackHandler()._dispatch_by_content_type(
+        message, state=None, raw_state="SupportStates:entering_message"
+    )
+
+    assert message.answer.await_args_list[0].args[0].startswith("📎 аудио 🎵 получен!")
+
+
+def test_callback_handlers_registered_once():
+    """Quick navigation is one prefix handler, before the unknown-callback catch-all."""
+    fallback = FixedSmartFallbackHandler()
+
+    names = [h.callback.__name__ for h in fallback.router.callback_query.handlers]
+
+    assert names == ["_dispatch_quick_nav", "handle_unknown_callback"]
+
+
+@pytest.mark.asyncio
+async def test_quick_nav_dispatches_by_suffix():
+    """Quick navigation callbacks run the action named after the prefix."""
+    fallback = FixedSmartFallbackHandler()
+    fallback._quick_nav = {"help": AsyncMock()}
+    callback = SimpleNamespace(data="quick_nav_help", answer=AsyncMock())
+
+    await fallback._dispatch_quick_nav(callback, state=None)
+    fallback._quick_nav["help"].assert_awaited_once_with(callback, None)
+    callback.answer.assert_awaited_once_with()
+
+    callback.data = "quick_nav_missing"
+    await fallback._dispatch_quick_nav(callback, state=None)
+    assert callback.answer.await_args.kwargs["show_alert"] is True
+
+
+@pytest.mark.asyncio
+async def test_quick_nav_action_error_is_raised_after_answer():
+    """The callback is answered even if the navigation action fails."""
+    fallback = FixedSmartFallbackHandler()
+    fallback._quick_nav = {"main": AsyncMock(side_effect=RuntimeError("edit failed"))}
+    callback = SimpleNamespace(data="quick_nav_main", answer=AsyncMock())
+
+    with pytest.raises(RuntimeError):
+        await fallback._dispatch_quick_nav(callback, state=None)
+
+    callback.answer.assert_awaited_once_with()
+
+
+@pytest.mark.asyncio
+async def test_main_menu_is_sent_with_the_reply(monkeypatch):
+    """The reply text and the main menu keyboard go out as one message."""
+    keyboard = object()
+    monkeypatch.setattr(FixedSmartFallbackHandler, "_main_menu_keyboard", AsyncMock(return_value=keyboard))
+    fallback = FixedSmartFallbackHandler()
+    message = SimpleNamespace(from_user=SimpleNamespace(id=1), answer=AsyncMock())
+
+    await fallback._answer_with_main_menu(message, "text")
+
+    message.answer.assert_awaited_once_with(
+        "text\n\nВыберите действие:", reply_markup=keyboard, parse_mode="Markdown"
+    )
+
+
+@pytest.mark.asyncio
+async def test_main_menu_keyboard_uses_status_cache(monkeypatch):
+    """Repeated fallbacks reuse the cached status and the per-status keyboard."""
+    lookup = AsyncMock(return_value="pending")
+    cache = MultiLevelCache(hot_ttl=10, warm_ttl=60, cold_ttl=300)
+    monkeypatch.setattr(fallback_module, "get_participant_status", lookup)
+    monkeypatch.setattr(fallback_module, "get_cache", lambda: cache)
+    fallback = FixedSmartFallbackHandler()
+
+    first = await fallback._main_menu_keyboard(1)
+    second = await fallback._main_menu_keyboard(1)
+
+    assert first is second
+    assert lookup.await_count == 1
+    assert first.keyboard[0][0].text == "⏳ Мой статус"
+
+
+@pytest.mark.asyncio
+async def test_slow_confusion_check_falls_back_to_neutral_reply(monkeypatch):
+    """A stalled confusion check does not hold up the reply."""
+    async def stalled(*args):
+        await asyncio.sleep(10)
+
+    manager = SimpleNamespace(
+        update_context=lambda *args: None,
+        peek_session=lambda telegram_id: None,
+        detect_user_confusion=stalled,
+    )
+    monkeypatch.setattr(fallback_module, "_CONFUSION_CHECK_TIMEOUT", 0.01)
+    confused = AsyncMock()
+    neutral = AsyncMock()
+    monkeypatch.setattr(FixedSmartFallbackHandler, "_handle_confused_user", confused)
+    monkeypatch.setattr(FixedSmartFallbackHandler, "_answer_with_main_menu", neutral)
+    fallback = FixedSmartFallbackHandler()
+    fallback._ctx_mgr = manager
+    message = SimpleNamespace(text="что тут делать", from_user=SimpleNamespace(id=1))
+
+    await fallback.handle_unexpected_text(message, state=None, raw_state=None)
+
+    confused.assert_not_awaited()
+    neutral.assert_awaited_once()
+
+
+def test_handler_has_no_instance_dict():
+    """Handler state is declared in __slots__."""
+    fallback = FixedSmartFallbackHandler()
+
+    assert not hasattr(fallback, "__dict__")
+
+
+def test_repeated_setup_installs_one_router(monkeypatch):
+    """Re-running setup reuses the handler and includes its router once."""
+    monkeypatch.setattr(fallback_module, "_fallback_handler", None)
+    dispatcher = Dispatcher()
+
+    first = fallback_module.setup_fixed_fallback_handlers(dispatcher)
+    second = fallback_module.setup_fixed_fallback_handlers(dispatcher)
+
+    assert first is second
+    assert dispatcher.sub_routers == [first.router]
+
+
+def test_phone_and_name_heuristics():
+    """Phone/name heuristics recognise typical registration input."""
+    fallback = FixedSmartFallbackHandler()
+
+    assert fallback._looks_like_phone("+7 (999) 123-45-67")
+    assert fallback._looks_like_phone("89991234567")
+    assert not fallback._looks_like_phone("12345")
+    assert fallback._looks_like_name("Анна-Мария Иванова")
+    assert not fallback._looks_like_name("Иван 123")
+    assert not fallback._looks_like_name("Иван")
+
+
+@pytest.mark.asyncio
+async def test_photo_outside_fsm_gets_only_menu_reply(monkeypatch):
+    """Outside FSM a photo is answered once, with the main menu and no error count."""
+    context_manager = SimpleNamespace(increment_error_count=lambda user_id: pytest.fail("counted"))
+    monkeypatch.setattr(fallback_module, "get_context_manager", lambda: context_manager)
+    monkeypatch.setattr(FixedSmartFallbackHandler, "_answer_with_main_menu", AsyncMock())
+    fallback = FixedSmartFallbackHandler()
+    message = SimpleNamespace(content_type=ContentType.PHOTO, answer=AsyncMock())
+
+    await fallback._dispatch_by_content_type(message, state=None, raw_state=None)
+
+    message.answer.assert_not_awaited()
+    fallback._answer_with_main_menu.assert_awaited_once_with(message, fallback_module._MSG_PHOTO)
+
+
+@pytest.mark.asyncio
+async def test_sticker_is_acknowledged_with_witty_reply(monkeypatch):
+    """Stickers get the next reply from the handler's sticker cycle."""
+    monkeypatch.setattr(fallback_module, "get_context_manager", lambda: None)
+    monkeypatch.setattr(FixedSmartFallbackHandler, "_answer_with_main_menu", AsyncMock())
+    fallback = FixedSmartFallbackHandler()
+    message = SimpleNamespace(content_type=ContentType.STICKER, answer=AsyncMock())
+
+    await fallback._dispatch_by_content_type(message, state=None, raw_state=None)
+
+    stickers = fallback_module._DEFAULT_WITTY_RESPONSES["sticker_in_registration"]
+    assert message.answer.await_args.args[0] in stickers
@@ -0,0 +1,44 @@
+"""Unit tests for the global command handlers."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+import bot.handlers.global_commands as global_module
+import database.repositories as repositories
+from bot.handlers.global_commands import GlobalCommandsHandler
+
+
+@pytest.mark.asyncio
+async def test_start_builds_menu_from_fetched_status(monkeypatch):
+    """/start for a registered user looks the status up once."""
+    status_lookup = AsyncMock(return_value="approved")
+    monkeypatch.setattr(repositories, "get_participant_status", status_lookup)
+    monkeypatch.setattr(repositories, "check_user_agreement", AsyncMock(return_value=True))
+    monkeypatch.setattr(global_module, "get_context_manager", lambda: None)
+    message = SimpleNamespace(from_user=SimpleNamespace(id=1), answer=AsyncMock())
+    state = SimpleNamespace(get_state=AsyncMock(return_value=None), clear=AsyncMock())
+
+    await GlobalCommandsHandler().handle_start(message, state)
+
+    assert status_lookup.await_count == 1
+    keyboard = message.answer.await_args.kwargs["reply_markup"]
+    assert keyboard.keyboard[0][0].text == "✅ Мой статус"
+
+
+@pytest.mark.asyncio
+async def test_back_to_menu_skips_registration_states():
+    """The back-to-menu filter rejects registration states and accepts others."""
+    from bot.states import RegistrationStates
+
+    handler = GlobalCommandsHandler()
+    back = next(
+        h for h in handler.router.message.handlers if h.callback == handler.back_to_menu
+    )
+    outside_registration = back.filters[-1]
+
+    assert not await outside_registration.call(
+        SimpleNamespace(), raw_state=RegistrationStates.enter_phone.state
+    )
+    assert await outside_registration.call(SimpleNamespace(), raw_state=None)
@@ -0,0 +1,106 @@
+"""Unit tests for outbound send throttling."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from bot.middleware.send_throttle import SendThrottleMiddleware
+
+
+@pytest.mark.asyncio
+async def test_sends_to_one_chat_are_spaced_in_order():
+    """Once the burst is used up, sends to a chat keep FIFO order and the interval."""
+    throttle = SendThrottleMiddleware(per_chat_interval=0.05, per_chat_burst=1)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append((method.text, time.monotonic()))
+        return method.text
+
+    for text in ("first", "second"):
+        await throttle(make_request, None, SimpleNamespace(chat_id=1, text=text))
+
+    assert [text for text, _ in sent] == ["first", "second"]
+    assert sent[1][1] - sent[0][1] >= 0.045
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_retried():
+    """Flood control errors are retried after the requested pause."""
+    throttle = SendThrottleMiddleware(per_chat_interval=0)
+    calls = []
+
+    async def make_request(bot, method):
+        calls.append(method)
+        if len(calls) == 1:
+            raise TelegramRetryAfter(method=method, message="Flood control", retry_after=0)
+        return "ok"
+
+    assert await throttle(make_request, None, SimpleNamespace(chat_id=1)) == "ok"
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_small_burst_is_not_delayed():
+    """A handler's first few requests to a chat go out without pacing."""
+    throttle = SendThrottleMiddleware(per_chat_interval=10, per_chat_burst=3)
+
+    async def make_request(bot, method):
+        return method.text
+
+    started = time.monotonic()
+    for text in ("send", "edit", "delete"):
+        await throttle(make_request, None, SimpleNamespace(chat_id=1, text=text))
+
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.asyncio
+async def test_retry_after_does_not_block_the_chat():
+    """Other requests to the chat proceed while a flood-controlled one waits."""
+    throttle = SendThrottleMiddleware(per_chat_interval=0)
+    sent = []
+
+    async def make_request(bot, method):
+        if method.text == "flooded" and "flooded" not in sent:
+            sent.append("flooded")
+            raise TelegramRetryAfter(method=method, message="Flood control", retry_after=0.2)
+        sent.append(method.text)
+        return method.text
+
+    flooded = asyncio.ensure_future(
+        throttle(make_request, None, SimpleNamespace(chat_id=1, text="flooded"))
+    )
+    await asyncio.sleep(0.01)
+    await asyncio.wait_for(
+        throttle(make_request, None, SimpleNamespace(chat_id=1, text="other")), timeout=0.1
+    )
+    await flooded
+
+    assert sent == ["flooded", "other", "flooded"]
+
+
+@pytest.mark.asyncio
+async def test_busy_chats_are_not_pruned():
+    """Only idle chats with a full bucket are dropped when the map is full."""
+    throttle = SendThrottleMiddleware(per_chat_interval=10, per_chat_burst=1, max_chats=2)
+    release = asyncio.Event()
+
+    async def make_request(bot, method):
+        if method.chat_id == 1:
+            await release.wait()
+        return "ok"
+
+    busy = asyncio.ensure_future(throttle(make_request, None, SimpleNamespace(chat_id=1)))
+    await asyncio.sleep(0)
+    busy_slot = throttle._chats[1]
+    throttle._slot(2)
+    throttle._slot(3)
+
+    assert throttle._chats[1] is busy_slot
+    assert 2 not in throttle._chats
+    release.set()
+    await busy